@@ -1,28 +1,63 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from prisma import Prisma
 from typing import Optional
+from app import metrics
 from app.auth.jwt_handler import verify_token
-from app.database import db
+from app.cache import TTLCache
+from app.config import settings
+from app.database import db, read_client
+from app.middleware.replica import is_pinned, track_write
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Per-process cache of authenticated users keyed by user ID. Other worker
+# processes are not invalidated, so PRINCIPAL_CACHE_TTL_SECONDS bounds how
+# long they may act on a changed or deleted user.
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+
+def invalidate_principal(user_id: str) -> None:
+    """
+    Drop a cached user so the next request reloads it from the database.
+    
+    Call whenever a user is updated or deleted. This only affects the
+    current process; other workers reload the user once their entry
+    expires (within PRINCIPAL_CACHE_TTL_SECONDS).
+    
+    Args:
+        user_id: User ID
+    """
+    principal_cache.pop(user_id)
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """
     Dependency to get the current authenticated user from JWT token.
     
+    Mutating requests are recorded as writes by the user, so their reads
+    stick to the primary afterwards (see ReadYourWritesMiddleware).
+    
     Args:
+        request: Current request
         credentials: HTTP Bearer credentials containing the JWT token
         
     Returns:
-        User object from database
+        User object (from the principal cache or the database)
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
     token = credentials.credentials
-    payload = verify_token(token, token_type="access")
+    with metrics.phase("token"):
+        payload = verify_token(token, token_type="access")
     
     if payload is None:
         raise HTTPException(
@@ -39,8 +74,16 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Fetch user from database
-    user = await db.user.find_unique(where={"id": user_id})
+    track_write(request, user_id)
+    
+    with metrics.phase("principal"):
+        # Serve from cache when possible; entries never outlive the token
+        user = principal_cache.get(user_id)
+        if user is not None:
+            return user
+        
+        # Fetch user from database
+        user = await db.user.find_unique(where={"id": user_id})
     
     if user is None:
         raise HTTPException(
@@ -49,9 +92,32 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    principal_cache.set(user_id, user, expires_at=payload.get("exp"))
+    
     return user
 
 
+async def get_read_db(
+    request: Request,
+    current_user = Depends(get_current_user)
+) -> Prisma:
+    """
+    Dependency choosing the client for read-only handlers.
+    
+    Returns the read replica when READ_DATABASE_URL is set, unless the
+    user wrote within READ_STICKY_SECONDS (in this process, or per the
+    sticky cookie) in which case the primary is used.
+    
+    Args:
+        request: Current request
+        current_user: Current authenticated user
+        
+    Returns:
+        Prisma client to read from
+    """
+    return read_client(current_user.id, pinned=is_pinned(request))
+
+
 async def require_admin(current_user = Depends(get_current_user)):
     """
     Dependency to ensure the current user has admin role.
@@ -1,8 +1,20 @@
+import hashlib
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from app.cache import TTLCache
 from app.config import settings
 
+# Verification key and algorithm list, prepared once at import
+_verification_key = jwk.construct(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+_algorithms = [settings.JWT_ALGORITHM]
+
+# Verified payloads keyed by token digest; entries expire at the token's exp
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -48,6 +60,10 @@ def verify_token(token: str, token_type: str = "access") -> Optional[Dict[str, A
     """
     Verify and decode a JWT token.
     
+    Tokens that verified successfully are cached until their `exp`, so a
+    client repeating the same bearer token skips signature verification.
+    The returned payload is shared and must not be modified.
+    
     Args:
         token: JWT token to verify
         token_type: Expected token type ("access" or "refresh")
@@ -55,13 +71,19 @@ def verify_token(token: str, token_type: str = "access") -> Optional[Dict[str, A
     Returns:
         Decoded token payload if valid, None otherwise
     """
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        
-        # Verify token type
-        if payload.get("type") != token_type:
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    
+    if payload is None:
+        try:
+            payload = jwt.decode(token, _verification_key, algorithms=_algorithms)
+        except JWTError:
             return None
-            
-        return payload
-    except JWTError:
+        
+        token_cache.set(digest, payload, expires_at=payload.get("exp"))
+    
+    # Verify token type
+    if payload.get("type") != token_type:
         return None
+        
+    return payload
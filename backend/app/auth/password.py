@@ -1,4 +1,10 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.config import settings
 
 # Password hashing context using bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -29,3 +35,137 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         True if password matches, False otherwise
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPool:
+    """
+    Bounded worker pool that runs bcrypt off the event loop.
+    
+    At most `workers + queue_size` hashes may be pending at once; further
+    requests are rejected with 503 instead of queueing without limit.
+    """
+    
+    def __init__(self, workers: int, queue_size: int, kind: str = "thread"):
+        """
+        Args:
+            workers: Number of hashing threads or processes
+            queue_size: Hashes allowed to wait for a free worker
+            kind: "thread" or "process"
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind}")
+        
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self.kind = kind
+        self.pending = 0
+        self.peak_pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._executor: Optional[Executor] = None
+    
+    def start(self) -> None:
+        """Create the executor (called from the app lifespan)."""
+        if self._executor is None:
+            executor_class = ThreadPoolExecutor if self.kind == "thread" else ProcessPoolExecutor
+            self._executor = executor_class(max_workers=self.workers)
+    
+    def shutdown(self) -> None:
+        """Stop the executor, waiting for in-flight hashes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a hashing function on the pool.
+        
+        Args:
+            fn: Module-level function to run (must be picklable for processes)
+            args: Positional arguments for `fn`
+            
+        Returns:
+            Result of `fn`
+            
+        Raises:
+            HTTPException: 503 if the pool is saturated
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        
+        self.start()
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        started = time.perf_counter()
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and hash latency metrics."""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+
+# Shared hashing pool for request handlers
+hashing_pool = HashingPool(
+    workers=settings.HASH_WORKERS,
+    queue_size=settings.HASH_QUEUE_SIZE,
+    kind=settings.HASH_POOL_KIND
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Hashed password
+        
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+    
+    Args:
+        plain_password: Plain text password to verify
+        hashed_password: Hashed password to compare against
+        
+    Returns:
+        True if password matches, False otherwise
+        
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
 class Settings(BaseSettings):
@@ -11,11 +12,68 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     CORS_ORIGINS: str = "http://localhost:8081,http://localhost:19006"
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    # Staleness bound of the per-process principal cache: updates and
+    # deletes invalidate it only in the worker that made them, so other
+    # workers can serve the old user (e.g. a demoted admin) for this long
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 5
+    TOKEN_CACHE_SIZE: int = 10000
+    BULK_MAX_ITEMS: int = 10000
+    BULK_CHUNK_SIZE: int = 1000
+    BULK_TX_TIMEOUT_SECONDS: int = 60
+    EXPORT_BATCH_SIZE: int = 1000
+    SCHEDULE_CACHE_SIZE: int = 4096
+    REPRICE_CHUNK_SIZE: int = 1000
+    HASH_POOL_KIND: str = "thread"
+    HASH_WORKERS: int = 4
+    HASH_QUEUE_SIZE: int = 64
+    DELINQUENCY_DEFAULT_DAYS: int = 90
+    DELINQUENCY_CHUNK_SIZE: int = 1000
+    METRICS_ENABLED: bool = False
+    # Shared directory where each worker publishes its metrics, so /metrics
+    # serves every worker of the server (labelled by pid) whichever answers
+    METRICS_DIR: Optional[str] = None
+    METRICS_PUBLISH_SECONDS: float = 5.0
+    LOG_LEVEL: str = "INFO"
+    SLOW_QUERY_MS: int = 200
+    QUERY_BUDGET: int = 25
+    APP_ENV: str = "development"
+    DB_POOL_SIZE: int = 0
+    DB_POOL_TIMEOUT_SECONDS: int = 10
+    READ_DATABASE_URL: Optional[str] = None
+    READ_STICKY_SECONDS: int = 5
+    INCLUDE_PAYMENTS_LIMIT: int = 10
+    INCLUDE_PAYMENTS_MAX: int = 100
     
     @property
     def cors_origins_list(self) -> List[str]:
         """Convert comma-separated CORS origins to list."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+
+    @property
+    def database_url(self) -> str:
+        """DATABASE_URL with the pool settings of this process applied."""
+        return self._with_pool(self.DATABASE_URL)
+
+    @property
+    def read_database_url(self) -> Optional[str]:
+        """READ_DATABASE_URL with the pool settings applied, if a replica is configured."""
+        return self._with_pool(self.READ_DATABASE_URL) if self.READ_DATABASE_URL else None
+
+    def _with_pool(self, url: str) -> str:
+        """
+        Add `connection_limit` (when DB_POOL_SIZE is set) and `pool_timeout`
+        to a connection string unless it already sets them.
+
+        Each worker process has its own pool per client, so a database sees
+        up to workers x DB_POOL_SIZE connections.
+        """
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        if self.DB_POOL_SIZE > 0:
+            query.setdefault("connection_limit", str(self.DB_POOL_SIZE))
+        query.setdefault("pool_timeout", str(self.DB_POOL_TIMEOUT_SECONDS))
+        return urlunsplit(parts._replace(query=urlencode(query)))
     
     class Config:
         env_file = ".env"
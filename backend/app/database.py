@@ -1,16 +1,254 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from starlette.types import Scope
 from prisma import Prisma
+from app import metrics
+from app.cache import TTLCache
+from app.config import settings
 
-# Global Prisma client instance
-db = Prisma()
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Queries issued and time spent in the database within one scope."""
+
+    def __init__(
+        self,
+        label: str = "-",
+        parent: Optional["QueryStats"] = None,
+        scope: Optional[Scope] = None
+    ):
+        """
+        Args:
+            label: Name used in logs when no route has been matched
+            parent: Enclosing scope that should also count these queries
+            scope: ASGI scope of the request, used to name its route
+        """
+        self.label = label
+        self.parent = parent
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Route template of the request once routed, otherwise the label."""
+        route = self.scope.get("route") if self.scope is not None else None
+        return route.path if route is not None else self.label
+
+    def record(self, seconds: float) -> None:
+        """Count one query here and in every enclosing scope."""
+        stats: Optional[QueryStats] = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats = stats.parent
+
+
+# Query accounting scope of the current request (or `count_queries` block)
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# Raw SQL statements (with parameters) recorded by `capture_raw_queries`
+RawQuery = Tuple[str, Tuple[Any, ...]]
+_captured_queries: ContextVar[Optional[List[RawQuery]]] = ContextVar("captured_queries", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Return the innermost active query accounting scope, if any."""
+    return _query_stats.get()
+
+
+@contextmanager
+def count_queries(label: str = "-", scope: Optional[Scope] = None) -> Iterator[QueryStats]:
+    """
+    Count the queries issued inside a block.
+
+    Scopes nest: queries are counted by every enclosing scope, so a block
+    around a request also sees the queries of the request's own scope.
+
+    Args:
+        label: Name for slow-query logs when no route is known
+        scope: ASGI scope when the block is a request
+
+    Yields:
+        QueryStats updated as queries run
+    """
+    stats = QueryStats(label, _query_stats.get(), scope)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Fail if a block issues more than `limit` queries.
+
+    Intended for tests and benchmarks, e.g. around an httpx call to an
+    ASGITransport-mounted app:
+
+        with assert_max_queries(3):
+            await client.get("/loans")
+
+    Args:
+        limit: Maximum number of queries allowed
+
+    Yields:
+        QueryStats for the block
+
+    Raises:
+        AssertionError: If the block issued more than `limit` queries
+    """
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f"Expected at most {limit} queries, got {stats.count} ({stats.seconds * 1000:.1f} ms)"
+    )
+
+
+@contextmanager
+def capture_raw_queries() -> Iterator[List[RawQuery]]:
+    """
+    Record the raw SQL statements issued inside a block.
+
+    Intended for tests, e.g. to EXPLAIN the statements a service issues.
+    Only `query_raw`/`execute_raw` calls carry SQL at this level; queries
+    built by Prisma's query builder are not recorded.
+
+    Yields:
+        List of (SQL, parameters), appended to as statements run
+    """
+    captured: List[RawQuery] = []
+    token = _captured_queries.set(captured)
+    try:
+        yield captured
+    finally:
+        _captured_queries.reset(token)
+
+
+def _describe(method: str, arguments: Dict[str, Any], model: Any) -> str:
+    """Short description of a query for logs: raw SQL or method and model."""
+    if "query" in arguments:
+        return " ".join(str(arguments["query"]).split())[:500]
+    name = getattr(model, "__name__", None)
+    return f"{method} {name}" if name else method
+
+
+class InstrumentedPrisma(Prisma):
+    """
+    Prisma client that accounts for every query.
+
+    Each query is added to the request's "db" timing phase and to the
+    active QueryStats scope, and queries slower than SLOW_QUERY_MS are
+    logged with the route that issued them.
+    """
+
+    __slots__ = ()
+
+    async def _execute(
+        self,
+        method: str,
+        arguments: Dict[str, Any],
+        model: Any = None,
+        root_selection: Any = None
+    ) -> Any:
+        captured = _captured_queries.get()
+        if captured is not None and "query" in arguments:
+            captured.append((arguments["query"], tuple(arguments.get("parameters", ()))))
+
+        started = time.perf_counter()
+        try:
+            return await super()._execute(method, arguments, model, root_selection)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.add("db", elapsed)
+
+            stats = _query_stats.get()
+            if stats is not None:
+                stats.record(elapsed)
+
+            if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+                logger.warning(
+                    "Slow query (%.1f ms) on %s: %s",
+                    elapsed * 1000,
+                    stats.route if stats is not None else "-",
+                    _describe(method, arguments, model)
+                )
+
+    def _copy(self) -> "InstrumentedPrisma":
+        # Transaction clients are copies; keep them instrumented
+        new = super()._copy()
+        new.__class__ = InstrumentedPrisma
+        return new
+
+
+# Global Prisma client instance (one per worker process)
+db = InstrumentedPrisma(datasource={"url": settings.database_url})
+
+# Read replica client; the primary itself when READ_DATABASE_URL is unset
+read_db = (
+    InstrumentedPrisma(datasource={"url": settings.read_database_url})
+    if settings.READ_DATABASE_URL
+    else db
+)
+
+# Users who wrote within READ_STICKY_SECONDS; their reads stay on the primary
+_STICKY_USERS = 100000
+_recent_writers = TTLCache(maxsize=_STICKY_USERS, ttl=settings.READ_STICKY_SECONDS)
+
+
+def has_replica() -> bool:
+    """Whether reads can be routed to a separate replica."""
+    return read_db is not db
+
+
+def mark_write(user_id: str) -> None:
+    """
+    Pin a user's reads to the primary for READ_STICKY_SECONDS.
+
+    Called when a request that may have written on behalf of the user
+    finishes, so the user's next reads can't see replica lag.
+
+    Args:
+        user_id: User ID
+    """
+    if has_replica():
+        _recent_writers.set(user_id, True)
+
+
+def read_client(user_id: str, pinned: bool = False) -> Prisma:
+    """
+    Client for a read-only request: the replica unless the user wrote recently.
+
+    Args:
+        user_id: User the request is made by
+        pinned: Force the primary (e.g. the client carries the sticky cookie)
+
+    Returns:
+        Prisma client to read from
+    """
+    if not has_replica() or pinned or _recent_writers.get(user_id) is not None:
+        return db
+    return read_db
 
 
 async def connect_db():
-    """Connect to the database."""
+    """Connect to the database (and the read replica, if configured)."""
     if not db.is_connected():
         await db.connect()
+    if has_replica() and not read_db.is_connected():
+        await read_db.connect()
 
 
 async def disconnect_db():
-    """Disconnect from the database."""
+    """Disconnect from the database (and the read replica, if configured)."""
+    if has_replica() and read_db.is_connected():
+        await read_db.disconnect()
     if db.is_connected():
         await db.disconnect()
@@ -0,0 +1,178 @@
+"""
+Entity tags for conditional requests.
+
+Single resources get a strong ETag encoding their `updatedAt` (millisecond
+precision, as stored) and a digest of the response model's fields, so a
+tag changes whenever the row or the representation does. Because the
+version is readable from the tag, `If-Match` on writes becomes one extra
+condition in the UPDATE's where clause.
+
+List pages get a weak ETag built from the page's latest `updatedAt` and
+row count, plus a digest of the row IDs and versions, the total and the
+next cursor, so rows moving in or out of a page also change it.
+Embedded relations add their rows' IDs and versions to either tag.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
+
+# Clients must revalidate, and shared caches must not store per-user data
+CACHE_CONTROL = "private, no-cache"
+
+
+def _schema(model: Type[BaseModel]) -> str:
+    """Short digest of a response model's fields."""
+    return _fields_digest(tuple(model.model_fields))
+
+
+@lru_cache(maxsize=256)
+def _fields_digest(fields: Tuple[str, ...]) -> str:
+    # Keyed by field names, not model class, so generated fieldset models
+    # are not kept alive here and the cache stays bounded
+    return hashlib.sha1(",".join(fields).encode()).hexdigest()[:8]
+
+
+def _millis(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MILLISECOND
+
+
+def resource_etag(row: Any, model: Type[BaseModel], related: str = "") -> str:
+    """
+    Strong ETag of a single resource.
+
+    Args:
+        row: Row with an `updatedAt` attribute
+        model: Response model the row is served as
+        related: Versions of embedded rows, if any (see `app.includes`)
+
+    Returns:
+        Quoted entity tag
+    """
+    if related:
+        return f'"{_millis(row.updatedAt)}-{_schema(model)}-{hashlib.sha1(related.encode()).hexdigest()[:12]}"'
+    return f'"{_millis(row.updatedAt)}-{_schema(model)}"'
+
+
+def list_etag(
+    rows: Sequence[Any],
+    model: Type[BaseModel],
+    total: Optional[int],
+    next_cursor: Optional[str],
+    related: str = ""
+) -> str:
+    """
+    Weak ETag of a list page.
+
+    Args:
+        rows: Rows of the page, with `id` and `updatedAt`
+        model: Response model of one row
+        total: Total count returned with the page
+        next_cursor: Cursor of the next page
+        related: Versions of embedded rows, if any (see `app.includes`)
+
+    Returns:
+        Weak entity tag
+    """
+    versions = [_millis(row.updatedAt) for row in rows]
+    digest = hashlib.sha1(f"{_schema(model)}|{total}|{next_cursor}|{related}".encode())
+    for row, version in zip(rows, versions):
+        digest.update(f"|{row.id}:{version}".encode())
+    return f'W/"{max(versions, default=0)}-{len(rows)}-{digest.hexdigest()[:16]}"'
+
+
+def _tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    """Drop the weak prefix (If-None-Match compares weakly)."""
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Headers sent with a tagged response (and its 304)."""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match matches `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = _tags(header)
+    return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Answer a conditional GET for a single resource.
+
+    Args:
+        request: Current request
+        response: Response whose headers FastAPI sends with the body
+        etag: Current entity tag of the resource
+
+    Returns:
+        A 304 response when `If-None-Match` matches, otherwise None (after
+        setting ETag and Cache-Control on `response`)
+    """
+    headers = cache_headers(etag)
+    if is_fresh(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+def if_match_versions(header: Optional[str]) -> Optional[List[datetime]]:
+    """
+    Versions (`updatedAt` values) a write is conditional on.
+
+    Tags of any representation (full or sparse fieldset) name the version
+    they were served at, so all of them can be used.
+
+    Args:
+        header: `If-Match` header value, if any
+
+    Returns:
+        None when the write is unconditional (no header, or "*"), otherwise
+        the `updatedAt` values named by the header's strong tags
+
+    Raises:
+        HTTPException: 412 if no tag can match the current representation
+    """
+    if header is None:
+        return None
+
+    tags = _tags(header)
+    if "*" in tags:
+        return None
+
+    versions = []
+    for tag in tags:
+        # Weak tags never match If-Match
+        if tag.startswith('"') and tag.endswith('"'):
+            millis = tag[1:-1].split("-", 1)[0]
+            if millis.isdigit():
+                versions.append(_EPOCH + int(millis) * _MILLISECOND)
+
+    if not versions:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not name a current version"
+        )
+    return versions
+
+
+def set_etag(response: Response, row: Any, model: Type[BaseModel]) -> None:
+    """Send the new ETag of a written resource."""
+    response.headers["ETag"] = resource_etag(row, model)
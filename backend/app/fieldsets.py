@@ -0,0 +1,124 @@
+"""
+Sparse fieldsets (`fields=` query parameter).
+
+A fieldset is served by two models built on first use and cached:
+
+- a trimmed response model with only the requested fields, in the order of
+  the full response model, used to build and document the payload;
+- a Prisma partial model (same `__prisma_model__`, fewer fields). Prisma
+  Client Python selects exactly the fields of the model a query is made
+  through, so querying via `Partial.prisma(client)` pushes the fieldset
+  down to the database.
+
+The partial model also carries the fields handlers need themselves
+(ID, cursor column, `updatedAt` for ETags, owner for access checks);
+those are read but only returned when requested.
+"""
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Tuple, Type
+from fastapi import HTTPException, status
+from prisma import bases, models
+from pydantic import BaseModel, ConfigDict, create_model
+from app.models.schemas import LoanResponse, PaymentResponse, UserResponse
+
+# Distinct fieldsets kept per resource; each costs two model classes
+_CACHE_SIZE = 128
+
+
+class Fieldset(NamedTuple):
+    """Models serving one requested set of fields."""
+    response_model: Type[BaseModel]
+    query_model: Type[BaseModel]
+    sparse: bool
+
+    def actions(self, client: Any) -> Any:
+        """Prisma model actions selecting this fieldset through `client`."""
+        return self.query_model.prisma(client)
+
+
+class Fieldsets:
+    """Sparse fieldsets of one resource."""
+
+    def __init__(
+        self,
+        response_model: Type[BaseModel],
+        prisma_model: Type[BaseModel],
+        prisma_base: Type[BaseModel],
+        required: Tuple[str, ...]
+    ):
+        """
+        Args:
+            response_model: Full response model; its fields are selectable
+            prisma_model: Generated Prisma model of the resource
+            prisma_base: Generated Prisma base class of the resource
+            required: Fields handlers always read (not returned unless asked)
+        """
+        self.response_model = response_model
+        self.prisma_model = prisma_model
+        self.prisma_base = prisma_base
+        self.required = required
+        self.full = Fieldset(response_model, prisma_model, sparse=False)
+        self._build = lru_cache(maxsize=_CACHE_SIZE)(self._build_uncached)
+
+    def select(self, fields: Optional[str], *also_read: str) -> Fieldset:
+        """
+        Resolve a `fields` query parameter.
+
+        Args:
+            fields: Comma-separated field names, or None for every field
+            also_read: Extra (possibly relational) fields the handler reads
+
+        Returns:
+            Fieldset to query and serialize with
+
+        Raises:
+            HTTPException: 400 if a field is not part of the response model
+        """
+        if not fields:
+            return self.full
+
+        requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+        unknown = requested.difference(self.response_model.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        if not requested:
+            return self.full
+
+        # Normalized key: permutations and duplicates share one entry
+        return self._build(tuple(sorted(requested)), tuple(sorted(set(self.required + also_read))))
+
+    def _build_uncached(self, requested: Tuple[str, ...], read: Tuple[str, ...]) -> Fieldset:
+        name = self.response_model.__name__
+        ordered = [field for field in self.response_model.model_fields if field in requested]
+        response_model = create_model(
+            f"{name}Fields",
+            __config__=ConfigDict(from_attributes=True),
+            **{field: self._definition(self.response_model, field) for field in ordered}
+        )
+
+        selected = [field for field in self.prisma_model.model_fields if field in requested or field in read]
+        query_model = create_model(
+            f"{self.prisma_model.__name__}Partial",
+            __base__=self.prisma_base,
+            **{field: self._definition(self.prisma_model, field) for field in selected}
+        )
+        return Fieldset(response_model, query_model, sparse=True)
+
+    @staticmethod
+    def _definition(model: Type[BaseModel], field: str) -> Tuple[Any, Any]:
+        info = model.model_fields[field]
+        return info.annotation, info
+
+
+loan_fields = Fieldsets(
+    LoanResponse, models.Loan, bases.BaseLoan, ("id", "userId", "createdAt", "updatedAt")
+)
+payment_fields = Fieldsets(
+    PaymentResponse, models.Payment, bases.BasePayment, ("id", "loanId", "date", "updatedAt")
+)
+user_fields = Fieldsets(
+    UserResponse, models.User, bases.BaseUser, ("id", "createdAt", "updatedAt")
+)
@@ -0,0 +1,173 @@
+"""
+Embedded loan relations (`include=` query parameter).
+
+`load_loan_relations` loads the requested relations for a whole page of
+loans with one query per relation, however many loans there are:
+
+- `payments`: the newest payments of each loan, capped per loan with
+  ROW_NUMBER() over the (loanId, date, id) index;
+- `user`: the owning users, read without the password column.
+
+The result is attached to each loan's payload when the response is encoded
+and contributes the embedded rows' versions to the ETag.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from prisma import Prisma
+from prisma.models import Payment
+from app.fieldsets import user_fields
+from app.models.schemas import PaymentResponse, UserResponse
+from app.responses import rows_payload
+
+LOAN_RELATIONS = ("payments", "user")
+
+# Every UserResponse field, so the password hash is never read
+_EMBEDDED_USER = user_fields.select(",".join(UserResponse.model_fields))
+
+
+def parse_include(include: Optional[str]) -> Tuple[str, ...]:
+    """
+    Resolve an `include` query parameter.
+
+    Args:
+        include: Comma-separated relation names, or None
+
+    Returns:
+        Requested relations, in LOAN_RELATIONS order
+
+    Raises:
+        HTTPException: 400 if a relation is not embeddable
+    """
+    if not include:
+        return ()
+
+    requested = {name.strip() for name in include.split(",") if name.strip()}
+    unknown = requested.difference(LOAN_RELATIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown relations: {', '.join(sorted(unknown))}"
+        )
+    return tuple(name for name in LOAN_RELATIONS if name in requested)
+
+
+class Embedded:
+    """Relations loaded for a set of loans."""
+
+    def __init__(
+        self,
+        payments: Optional[Dict[str, List[Payment]]] = None,
+        users: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            payments: Loan ID -> its newest payments, if included
+            users: User ID -> user, if included
+        """
+        self.payments = payments
+        self.users = users
+
+    def attach(self, payload: Dict[str, Any], loan: Any) -> Dict[str, Any]:
+        """Add the included relations of `loan` to its payload."""
+        if self.payments is not None:
+            payload["payments"] = rows_payload(self.payments.get(loan.id, []), PaymentResponse)
+        if self.users is not None:
+            user = self.users.get(loan.userId)
+            payload["user"] = rows_payload([user], UserResponse)[0] if user is not None else None
+        return payload
+
+    def version_key(self) -> str:
+        """IDs and versions of every embedded row, for the response's ETag."""
+        parts = []
+        if self.payments is not None:
+            parts.append("payments")
+            for loan_id in sorted(self.payments):
+                parts.extend(f"{row.id}:{row.updatedAt.isoformat()}" for row in self.payments[loan_id])
+        if self.users is not None:
+            parts.append("user")
+            parts.extend(f"{user_id}:{self.users[user_id].updatedAt.isoformat()}" for user_id in sorted(self.users))
+        return "|".join(parts)
+
+
+async def load_payments(client: Prisma, loan_ids: Sequence[str], per_loan: int) -> Dict[str, List[Payment]]:
+    """
+    Load the newest payments of many loans in one query.
+
+    Args:
+        client: Prisma client to read with
+        loan_ids: Loans whose payments to load
+        per_loan: Maximum payments per loan
+
+    Returns:
+        Loan ID -> payments ordered by (date, id) descending
+    """
+    ids = sorted(set(loan_ids))
+    if not ids:
+        return {}
+
+    placeholders = ", ".join(f"${index + 2}" for index in range(len(ids)))
+    rows = await client.query_raw(
+        'SELECT "id", "loanId", "amount", "date", "status", "createdAt", "updatedAt" FROM ('
+        '  SELECT p.*, ROW_NUMBER() OVER ('
+        '    PARTITION BY p."loanId" ORDER BY p."date" DESC, p."id" DESC'
+        '  ) AS "rank"'
+        f'  FROM "Payment" p WHERE p."loanId" IN ({placeholders})'
+        ') ranked WHERE "rank" <= $1 '
+        'ORDER BY "loanId", "date" DESC, "id" DESC',
+        per_loan,
+        *ids,
+        model=Payment
+    )
+
+    payments: Dict[str, List[Payment]] = {}
+    for row in rows:
+        payments.setdefault(row.loanId, []).append(row)
+    return payments
+
+
+async def load_users(client: Prisma, user_ids: Sequence[str]) -> Dict[str, Any]:
+    """
+    Load many users in one query.
+
+    Args:
+        client: Prisma client to read with
+        user_ids: Users to load
+
+    Returns:
+        User ID -> user (UserResponse fields only)
+    """
+    ids = sorted(set(user_ids))
+    if not ids:
+        return {}
+
+    users = await _EMBEDDED_USER.actions(client).find_many(where={"id": {"in": ids}})
+    return {user.id: user for user in users}
+
+
+async def load_loan_relations(
+    client: Prisma,
+    loans: Sequence[Any],
+    relations: Sequence[str],
+    payments_limit: int
+) -> Optional[Embedded]:
+    """
+    Load the included relations of a page of loans.
+
+    Args:
+        client: Prisma client to read with
+        loans: Loans (with `id` and `userId`)
+        relations: Relations from `parse_include`
+        payments_limit: Maximum payments embedded per loan
+
+    Returns:
+        Loaded relations, or None when nothing was included
+    """
+    if not relations:
+        return None
+
+    embedded = Embedded()
+    if "payments" in relations:
+        embedded.payments = await load_payments(client, [loan.id for loan in loans], payments_limit)
+    if "user" in relations:
+        embedded.users = await load_users(client, [loan.userId for loan in loans])
+    return embedded
@@ -1,9 +1,21 @@
+import asyncio
+import logging
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+from app import metrics
 from app.config import settings
-from app.database import connect_db, disconnect_db
-from app.routes import auth, users, loans, payments
+from app.auth.password import hashing_pool
+from app.database import connect_db, disconnect_db, has_replica
+from app.middleware.queries import QueryAccountingMiddleware
+from app.middleware.replica import ReadYourWritesMiddleware
+from app.middleware.timing import TimingMiddleware
+from app.routes import auth, users, loans, payments, analytics
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -13,11 +25,26 @@ async def lifespan(app: FastAPI):
     """
     # Startup: Connect to database
     await connect_db()
-    print("✅ Connected to database")
+    logger.info(
+        "Worker %d connected to database (pool size: %s)",
+        os.getpid(),
+        settings.DB_POOL_SIZE or "engine default"
+    )
+    if has_replica():
+        logger.info("Worker %d connected to read replica", os.getpid())
+    hashing_pool.start()
+    publisher = None
+    if settings.METRICS_ENABLED and settings.METRICS_DIR:
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        publisher = asyncio.create_task(metrics.publish_periodically())
     yield
     # Shutdown: Disconnect from database
+    if publisher is not None:
+        publisher.cancel()
+        metrics.unpublish()
+    hashing_pool.shutdown()
     await disconnect_db()
-    print("✅ Disconnected from database")
+    logger.info("Worker %d disconnected from database", os.getpid())
 
 
 # Create FastAPI application
@@ -35,13 +62,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
 
+# Pin writers' reads to the primary for READ_STICKY_SECONDS
+if has_replica():
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Per-request query counts; logs requests over QUERY_BUDGET
+app.add_middleware(QueryAccountingMiddleware)
+
+# Per-request phase timings (Server-Timing header) and /metrics; off by
+# default so requests pay nothing beyond a context variable lookup
+if settings.METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+
 # Register routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(loans.router)
 app.include_router(payments.router)
+app.include_router(analytics.router)
 
 
 @app.get("/")
@@ -59,3 +100,10 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Request latency histograms and cache/pool gauges in Prometheus text format."""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
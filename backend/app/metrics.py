@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.config import settings
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phase durations of the current request; None when timing is off
+_request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+# Metric family: name, HELP text, TYPE and its sample lines
+Family = Tuple[str, str, str, List[str]]
+
+
+class Histogram:
+    """
+    Prometheus-style latency histogram keyed by label values.
+
+    Observations are only made from the event loop thread, so no locking
+    is needed.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        """
+        Args:
+            name: Metric name
+            help_text: HELP line shown by /metrics
+            label_names: Names of the labels, in the order values are passed
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], seconds: float) -> None:
+        """Record one observation for a label combination."""
+        series = self._series.get(label_values)
+        if series is None:
+            # Per-bucket counts followed by sum and count
+            series = self._series[label_values] = [0.0] * (len(BUCKETS) + 2)
+        index = bisect_left(BUCKETS, seconds)
+        if index < len(BUCKETS):
+            series[index] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def collect(self, extra_labels: Tuple[Tuple[str, str], ...] = ()) -> Family:
+        """Return the histogram's samples, each also carrying `extra_labels`."""
+        samples = []
+        for label_values, series in sorted(self._series.items()):
+            labels = _labels(extra_labels + tuple(zip(self.label_names, label_values)))
+            cumulative = 0.0
+            for bound, count in zip(BUCKETS, series):
+                cumulative += count
+                samples.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative:g}')
+            samples.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]:g}')
+            samples.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            samples.append(f"{self.name}_count{{{labels}}} {series[-1]:g}")
+        return self.name, self.help_text, "histogram", samples
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start to response end.",
+    ("method", "route", "status")
+)
+phase_duration = Histogram(
+    "http_request_phase_seconds",
+    "Time spent per request phase (token, principal, db, endpoint, serialize).",
+    ("route", "phase")
+)
+
+
+def start_request() -> Dict[str, float]:
+    """Begin collecting phase timings for the current request."""
+    phases: Dict[str, float] = {}
+    _request_phases.set(phases)
+    return phases
+
+
+def add(phase: str, seconds: float) -> None:
+    """Add time to a phase of the current request (no-op when timing is off)."""
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a block as part of a request phase.
+
+    Repeated blocks of the same phase (e.g. several DB queries) are summed.
+    Costs one context variable lookup when timing is off.
+    """
+    phases = _request_phases.get()
+    if phases is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def server_timing(phases: Dict[str, float]) -> str:
+    """Format phase timings as a Server-Timing header value (milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items())
+
+
+# Stats that only ever increase; exported as counters, the rest as gauges
+_CUMULATIVE_STATS = frozenset({"hits", "misses", "rejected", "completed"})
+
+
+def _stat_families(
+    prefix: str,
+    help_text: str,
+    stats: Dict[str, object],
+    extra_labels: Tuple[Tuple[str, str], ...]
+) -> List[Family]:
+    labels = f"{{{_labels(extra_labels)}}}" if extra_labels else ""
+    families = []
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key in _CUMULATIVE_STATS:
+                name, kind = f"{prefix}_{key}_total", "counter"
+            else:
+                name, kind = f"{prefix}_{key}", "gauge"
+            families.append((name, f"{help_text} ({key}).", kind, [f"{name}{labels} {value:g}"]))
+    return families
+
+
+def collect(extra_labels: Tuple[Tuple[str, str], ...] = ()) -> List[Family]:
+    """Return every metric family of this process, with `extra_labels` on each sample."""
+    # Imported here to avoid import cycles with the modules being measured
+    from app.auth.dependencies import principal_cache
+    from app.auth.jwt_handler import token_cache
+    from app.auth.password import hashing_pool
+    from app.services import amortization
+
+    families = [request_duration.collect(extra_labels), phase_duration.collect(extra_labels)]
+    families += _stat_families("principal_cache", "Authenticated user cache", principal_cache.stats(), extra_labels)
+    families += _stat_families("token_cache", "Verified JWT cache", token_cache.stats(), extra_labels)
+    families += _stat_families("schedule_cache", "Amortization schedule cache", amortization.cache_stats(), extra_labels)
+    families += _stat_families("hashing_pool", "bcrypt hashing pool", hashing_pool.stats(), extra_labels)
+    return families
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f"worker-{pid}.json")
+
+
+def publish() -> None:
+    """
+    Write this worker's metrics, labelled with its pid, to METRICS_DIR.
+
+    The file is replaced atomically, so readers never see a partial snapshot.
+    """
+    path = _snapshot_path(os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(collect((("pid", str(os.getpid())),)), f)
+    os.replace(temporary, path)
+
+
+def unpublish() -> None:
+    """Remove this worker's snapshot (on shutdown)."""
+    try:
+        os.remove(_snapshot_path(os.getpid()))
+    except FileNotFoundError:
+        pass
+
+
+async def publish_periodically() -> None:
+    """Publish this worker's snapshot every METRICS_PUBLISH_SECONDS until cancelled."""
+    while True:
+        publish()
+        await asyncio.sleep(settings.METRICS_PUBLISH_SECONDS)
+
+
+def _published() -> List[Family]:
+    """Families of every worker with a fresh snapshot in METRICS_DIR, merged by name."""
+    # Workers that stopped without unpublishing (e.g. killed) go stale
+    oldest = time.time() - 3 * settings.METRICS_PUBLISH_SECONDS
+    merged: Dict[str, Family] = {}
+    for entry in sorted(os.scandir(settings.METRICS_DIR), key=lambda entry: entry.name):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if entry.stat().st_mtime < oldest:
+                continue
+            with open(entry.path) as f:
+                families = json.load(f)
+        except (FileNotFoundError, ValueError):
+            # Removed by a stopping worker, or unreadable
+            continue
+        for name, help_text, kind, samples in families:
+            if name not in merged:
+                merged[name] = (name, help_text, kind, [])
+            merged[name][3].extend(samples)
+    return list(merged.values())
+
+
+def render() -> str:
+    """
+    Render metrics in Prometheus text format.
+
+    With METRICS_DIR set, every worker's samples are served (labelled with
+    its pid), whichever worker answers the scrape; otherwise only this
+    process's.
+    """
+    if settings.METRICS_DIR:
+        publish()
+        families = _published()
+    else:
+        families = collect()
+
+    lines = []
+    for name, help_text, kind, samples in families:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
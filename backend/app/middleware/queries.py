@@ -0,0 +1,37 @@
+import logging
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.database import count_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryAccountingMiddleware:
+    """
+    Pure ASGI middleware counting the database queries of each request.
+
+    Requests issuing more than QUERY_BUDGET queries (usually an N+1 loop)
+    are logged with their route, query count and total DB time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries(scope=scope) as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if settings.QUERY_BUDGET and stats.count > settings.QUERY_BUDGET:
+                    logger.warning(
+                        "Query budget exceeded on %s %s: %d queries (budget %d), %.1f ms in DB",
+                        scope["method"],
+                        stats.route,
+                        stats.count,
+                        settings.QUERY_BUDGET,
+                        stats.seconds * 1000
+                    )
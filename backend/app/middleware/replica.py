@@ -0,0 +1,72 @@
+from typing import Optional
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.database import mark_write
+
+# Methods that never write; everything else may
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Cookie pinning a client's reads to the primary across worker processes
+STICKY_COOKIE = "read_primary"
+
+
+def track_write(request: Request, user_id: str) -> None:
+    """
+    Record the user a mutating request acts for.
+
+    ReadYourWritesMiddleware pins that user's reads to the primary once
+    the request finishes.
+
+    Args:
+        request: Current request
+        user_id: User ID
+    """
+    if request.method not in SAFE_METHODS:
+        request.state.writer_id = user_id
+
+
+def is_pinned(request: Request) -> bool:
+    """Whether the client carries the sticky cookie of a recent write."""
+    return STICKY_COOKIE in request.cookies
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware giving writers read-your-writes consistency.
+
+    After a mutating request made for a user (see `track_write`), that
+    user's reads go to the primary for READ_STICKY_SECONDS in this process,
+    and the response sets a cookie with the same lifetime so reads landing
+    on other workers or containers are pinned too. Only installed when
+    READ_DATABASE_URL is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        # Request.state writes into this dict, shared with the routed request
+        state = scope.setdefault("state", {})
+        cookie = (
+            f"{STICKY_COOKIE}=1; Max-Age={settings.READ_STICKY_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+        ).encode()
+
+        async def send_with_cookie(message: Message) -> None:
+            writer_id: Optional[str] = state.get("writer_id")
+            if message["type"] == "http.response.start" and writer_id is not None:
+                mark_write(writer_id)
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            # Streamed writes (e.g. ingest) finish after the response started
+            writer_id = state.get("writer_id")
+            if writer_id is not None:
+                mark_write(writer_id)
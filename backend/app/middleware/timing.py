@@ -0,0 +1,106 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Coroutine, Optional
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import metrics
+
+# perf_counter() at which the current request's route function returned
+_endpoint_finished: ContextVar[Optional[float]] = ContextVar("endpoint_finished", default=None)
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request.
+
+    Phase timings collected during the request (see `app.metrics.phase`)
+    are returned in a `Server-Timing` header and, together with the total
+    duration, recorded in per-route histograms for `/metrics`. Being pure
+    ASGI, it does not buffer bodies, so streaming responses are unaffected.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = metrics.start_request()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                phases["total"] = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", metrics.server_timing(phases).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded
+            route_path = route.path if route is not None else "<unmatched>"
+
+            metrics.request_duration.observe((scope["method"], route_path, str(status_code)), elapsed)
+            for name, seconds in phases.items():
+                if name != "total":
+                    metrics.phase_duration.observe((route_path, name), seconds)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits handler time into "endpoint" (the route function)
+    and "serialize" (response validation, serialization and rendering).
+
+    Dependencies such as authentication run before the endpoint and report
+    their own phases.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            _endpoint_finished.set(None)
+            response = await handler(request)
+            finished = _endpoint_finished.get()
+            if finished is not None:
+                metrics.add("serialize", time.perf_counter() - finished)
+            return response
+
+        return timed_handler
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a route function so its run time is reported as the "endpoint" phase."""
+    # include_router() rebuilds routes from already wrapped endpoints
+    if not asyncio.iscoroutinefunction(endpoint) or getattr(endpoint, "_timed", False):
+        return endpoint
+
+    # FastAPI reads the signature through __wrapped__, so parameters and
+    # dependencies are resolved exactly as for the original function
+    @wraps(endpoint)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            metrics.add("endpoint", finished - started)
+            _endpoint_finished.set(finished)
+
+    timed._timed = True
+    return timed
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 
 # ============ Auth Schemas ============
@@ -68,7 +68,8 @@ class UserResponse(UserBase):
 class UserListResponse(BaseModel):
     """Response model for list of users."""
     users: List[UserResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # ============ Loan Schemas ============
@@ -104,6 +105,10 @@ class LoanResponse(LoanBase):
     """Response model for loan data."""
     id: str
     userId: str
+    paidAmount: float = 0
+    paymentCount: int = 0
+    lastPaymentDate: Optional[datetime] = None
+    outstandingBalance: float = 0
     createdAt: datetime
     updatedAt: datetime
     
@@ -111,10 +116,61 @@ class LoanResponse(LoanBase):
         from_attributes = True
 
 
+class LoanRepriceRequest(BaseModel):
+    """Request model for repricing a set of loans."""
+    interestRate: float = Field(..., ge=0, le=100)
+    currentRate: Optional[float] = Field(None, ge=0, le=100)
+    status: Optional[str] = Field(None, pattern="^(pending|active|completed|defaulted)$")
+    userId: Optional[str] = None
+
+
+class LoanRepriceResponse(BaseModel):
+    """Summary of a repricing run."""
+    matched: int
+    updated: int
+    skipped: int
+    elapsedSeconds: float
+    rowsPerSecond: float
+
+
+class LoanBulkItemResult(BaseModel):
+    """Outcome of one item in a bulk loan request."""
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class LoanBulkResponse(BaseModel):
+    """Response model for bulk loan creation."""
+    results: List[LoanBulkItemResult]
+    created: int
+    failed: int
+
+
+class AmortizationInstallment(BaseModel):
+    """One period of an amortization schedule."""
+    number: int
+    dueDate: date
+    payment: float
+    principal: float
+    interest: float
+    balance: float
+
+
+class AmortizationScheduleResponse(BaseModel):
+    """Response model for a loan's repayment schedule."""
+    loanId: str
+    monthlyPayment: float
+    totalPayment: float
+    totalInterest: float
+    installments: List[AmortizationInstallment]
+
+
 class LoanListResponse(BaseModel):
     """Response model for list of loans."""
     loans: List[LoanResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # ============ Payment Schemas ============
@@ -149,7 +205,37 @@ class PaymentResponse(PaymentBase):
         from_attributes = True
 
 
+class PaymentIngestResult(BaseModel):
+    """Outcome of one NDJSON line in a payment ingestion request."""
+    line: int
+    status: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
 class PaymentListResponse(BaseModel):
     """Response model for list of payments."""
     payments: List[PaymentResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# ============ Analytics Schemas ============
+
+class PortfolioBucket(BaseModel):
+    """Portfolio totals for one (status, origination month) bucket."""
+    status: str
+    originationMonth: str
+    loanCount: int
+    totalAmount: float
+    paidAmount: float
+    outstandingPrincipal: float
+
+
+class PortfolioSummaryResponse(BaseModel):
+    """Response model for the portfolio summary."""
+    buckets: List[PortfolioBucket]
+    loanCount: int
+    totalAmount: float
+    paidAmount: float
+    outstandingPrincipal: float
@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_value: datetime, record_id: str) -> str:
+    """
+    Encode a keyset position as an opaque cursor.
+
+    Args:
+        sort_value: Value of the sort column of the last row on the page
+        record_id: ID of the last row on the page (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([sort_value.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor: Opaque cursor string
+
+    Returns:
+        Tuple of (sort value, record ID)
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), str(record_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_where(cursor: str, field: str) -> Dict[str, Any]:
+    """
+    Build the filter selecting rows after a cursor in (field, id) DESC order.
+
+    Args:
+        cursor: Opaque cursor string
+        field: Sort column name (e.g. "createdAt" or "date")
+
+    Returns:
+        Prisma where conditions to merge into the page query
+    """
+    sort_value, record_id = decode_cursor(cursor)
+    return keyset_after(sort_value, record_id, field)
+
+
+def keyset_after(sort_value: datetime, record_id: str, field: str) -> Dict[str, Any]:
+    """
+    Build the filter selecting rows after a known (field, id) position.
+
+    Args:
+        sort_value: Sort column value of the last row seen
+        record_id: ID of the last row seen
+        field: Sort column name
+
+    Returns:
+        Prisma where conditions for rows strictly after that position
+    """
+    return {
+        "OR": [
+            {field: {"lt": sort_value}},
+            {field: sort_value, "id": {"lt": record_id}},
+        ]
+    }
+
+
+def keyset_order(field: str) -> List[Dict[str, str]]:
+    """Return the stable (field, id) DESC ordering used by keyset pages."""
+    return [{field: "desc"}, {"id": "desc"}]
+
+
+def paginate(rows: Sequence[Any], limit: int, field: str) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim a page fetched with `take=limit + 1` and compute the next cursor.
+
+    Args:
+        rows: Rows returned by the page query
+        limit: Requested page size
+        field: Sort column name
+
+    Returns:
+        Tuple of (page rows, next cursor or None on the last page)
+    """
+    if limit <= 0:
+        return [], None
+
+    if len(rows) <= limit:
+        return list(rows), None
+
+    page = list(rows[:limit])
+    last = page[-1]
+    return page, encode_cursor(getattr(last, field), last.id)
+
+
+async def iter_keyset_batches(
+    actions: Any,
+    where: Dict[str, Any],
+    field: str,
+    batch_size: int
+) -> AsyncIterator[List[Any]]:
+    """
+    Walk a whole filtered table in (field, id) DESC order, one batch at a time.
+
+    Each batch is a separate keyset query, so no query ever skips rows and
+    only one batch is held in memory.
+
+    Args:
+        actions: Prisma model actions (e.g. `db.loan`)
+        where: Filter conditions
+        field: Sort column name
+        batch_size: Rows per query
+
+    Yields:
+        Lists of up to `batch_size` rows
+    """
+    position: Dict[str, Any] = {}
+
+    while True:
+        conditions = {**where, **position}
+        rows = await actions.find_many(
+            where=conditions if conditions else None,
+            take=batch_size,
+            order=keyset_order(field)
+        )
+        if not rows:
+            return
+
+        yield rows
+
+        if len(rows) < batch_size:
+            return
+
+        last = rows[-1]
+        position = keyset_after(getattr(last, field), last.id, field)
@@ -0,0 +1,157 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+import orjson
+from fastapi import Request, status
+from fastapi.responses import Response
+from pydantic import BaseModel
+from starlette.types import Receive, Scope, Send
+from app import etags, metrics
+
+if TYPE_CHECKING:
+    from app.includes import Embedded
+
+# Matches Pydantic's JSON output: UTC datetimes end in "Z"
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+def _fields_of(model: Type[BaseModel]) -> Tuple[Tuple[str, ...], Callable[[Any], Any]]:
+    fields = tuple(model.model_fields)
+    return fields, _getter(fields)
+
+
+@lru_cache(maxsize=256)
+def _getter(fields: Tuple[str, ...]) -> Callable[[Any], Any]:
+    """Getter returning the values of `fields` as a tuple (cached by field names)."""
+    getter = attrgetter(*fields)
+    # attrgetter returns a bare value, not a tuple, for a single field
+    return getter if len(fields) > 1 else lambda row: (getter(row),)
+
+
+def rows_payload(rows: Sequence[Any], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Build JSON-ready dicts from DB rows with the fields of a response model.
+
+    Rows straight from Prisma already have the right types, so they are not
+    validated again; fields outside the model (e.g. password) are left out.
+
+    Args:
+        rows: Prisma models (or any objects with the model's attributes)
+        model: Response model whose fields to include, in order
+
+    Returns:
+        One dict per row
+    """
+    fields, getter = _fields_of(model)
+    return [dict(zip(fields, getter(row))) for row in rows]
+
+
+def list_response(
+    request: Request,
+    key: str,
+    rows: Sequence[Any],
+    model: Type[BaseModel],
+    total: Optional[int],
+    next_cursor: Optional[str],
+    embedded: Optional["Embedded"] = None
+) -> Response:
+    """
+    Encode a page of rows as a `*ListResponse` body with orjson.
+
+    Skips FastAPI's response model validation and the standard JSON encoder.
+    The route keeps its `response_model` for the OpenAPI schema, and the
+    body is identical to what that model would produce. The page carries a
+    weak ETag; when the request's If-None-Match matches it, a 304 is
+    returned without serializing anything.
+
+    Args:
+        request: Current request
+        key: Name of the list field (e.g. "loans")
+        rows: Rows of the page
+        model: Response model of one row
+        total: Total count, if requested
+        next_cursor: Cursor of the next page, if any
+        embedded: Relations to attach to each row, if any were included
+
+    Returns:
+        JSON response, or 304 Not Modified
+    """
+    related = embedded.version_key() if embedded is not None else ""
+    etag = etags.list_etag(rows, model, total, next_cursor, related)
+    headers = etags.cache_headers(etag)
+    if etags.is_fresh(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    with metrics.phase("serialize"):
+        payload = rows_payload(rows, model)
+        if embedded is not None:
+            payload = [embedded.attach(item, row) for item, row in zip(payload, rows)]
+        body = orjson.dumps(
+            {key: payload, "total": total, "next_cursor": next_cursor},
+            option=_ORJSON_OPTIONS
+        )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def item_response(
+    row: Any,
+    model: Type[BaseModel],
+    headers: Mapping[str, str],
+    embedded: Optional["Embedded"] = None
+) -> Response:
+    """
+    Encode a single row with the fields of `model` (e.g. a sparse fieldset).
+
+    Args:
+        row: Row to encode
+        model: Response model whose fields to include
+        headers: Headers to send (e.g. the ETag set on the injected response)
+        embedded: Relations to attach to the row, if any were included
+
+    Returns:
+        JSON response
+    """
+    with metrics.phase("serialize"):
+        payload = rows_payload([row], model)[0]
+        if embedded is not None:
+            payload = embedded.attach(payload, row)
+        body = orjson.dumps(payload, option=_ORJSON_OPTIONS)
+    return Response(content=body, media_type="application/json", headers=dict(headers))
+
+
+class DuplexStreamingResponse(Response):
+    """
+    Streaming response whose iterator may read the request body.
+
+    StreamingResponse listens for client disconnects on the receive channel
+    while it streams, which would swallow body messages the iterator reads
+    with `request.stream()`. This response never calls `receive` itself, so
+    results can be sent while the upload is still arriving; a client that
+    goes away surfaces as ClientDisconnect from the body read instead.
+    """
+
+    def __init__(
+        self,
+        content: AsyncIterator[str],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None
+    ):
+        """
+        Args:
+            content: Async iterator of body parts (str or bytes)
+            status_code: Response status
+            headers: Extra headers
+            media_type: Content type
+        """
+        self.body_iterator = content
+        self.status_code = status_code
+        self.media_type = media_type if media_type is not None else self.media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        async for part in self.body_iterator:
+            body = part if isinstance(part, bytes) else part.encode(self.charset)
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
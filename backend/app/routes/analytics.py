@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends
+from typing import Optional
+from app.models.schemas import PortfolioBucket, PortfolioSummaryResponse
+from app.auth.dependencies import require_admin
+from app.database import db
+from app.middleware.timing import TimedRoute
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"], route_class=TimedRoute)
+
+
+@router.get("/portfolio", response_model=PortfolioSummaryResponse)
+async def get_portfolio_summary(
+    status: Optional[str] = None,
+    current_user = Depends(require_admin)
+):
+    """
+    Get portfolio totals by loan status and origination month (admin only).
+    
+    Totals are read from the incrementally maintained PortfolioSummary
+    table, so the cost does not grow with the number of loans or payments.
+    Each bucket's stripes are summed here.
+    
+    Args:
+        status: Optional filter by loan status
+        current_user: Current authenticated admin user
+        
+    Returns:
+        Per-bucket totals and portfolio-wide totals
+    """
+    rows = await db.portfoliosummary.find_many(
+        where={"status": status} if status else None,
+        order=[{"originationMonth": "asc"}, {"status": "asc"}]
+    )
+    
+    # (status, month) -> [loan count, total amount, paid amount], in row order
+    totals = {}
+    for row in rows:
+        entry = totals.setdefault((row.status, row.originationMonth), [0, 0.0, 0.0])
+        entry[0] += row.loanCount
+        entry[1] += row.totalAmount
+        entry[2] += row.paidAmount
+    
+    buckets = [
+        PortfolioBucket(
+            status=bucket_status,
+            originationMonth=month,
+            loanCount=loan_count,
+            totalAmount=amount,
+            paidAmount=paid,
+            outstandingPrincipal=amount - paid
+        )
+        for (bucket_status, month), (loan_count, amount, paid) in totals.items()
+        if loan_count
+    ]
+    
+    total_amount = sum(bucket.totalAmount for bucket in buckets)
+    paid_amount = sum(bucket.paidAmount for bucket in buckets)
+    
+    return PortfolioSummaryResponse(
+        buckets=buckets,
+        loanCount=sum(bucket.loanCount for bucket in buckets),
+        totalAmount=total_amount,
+        paidAmount=paid_amount,
+        outstandingPrincipal=total_amount - paid_amount
+    )
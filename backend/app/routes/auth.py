@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
 from app.models.schemas import (
     RegisterRequest,
     LoginRequest,
@@ -6,21 +6,26 @@ from app.models.schemas import (
     RefreshRequest,
     UserResponse
 )
-from app.auth.password import hash_password, verify_password
+from app.auth.password import hash_password_async, verify_password_async
 from app.auth.jwt_handler import create_access_token, create_refresh_token, verify_token
 from app.auth.dependencies import get_current_user
+from app import etags
 from app.database import db
+from app.services import counters
+from app.middleware.replica import track_write
+from app.middleware.timing import TimedRoute
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=TimedRoute)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: RegisterRequest):
+async def register(user_data: RegisterRequest, request: Request):
     """
     Register a new user.
     
     Args:
         user_data: User registration data
+        request: Current request
         
     Returns:
         Created user object
@@ -36,19 +41,24 @@ async def register(user_data: RegisterRequest):
             detail="Email already registered"
         )
     
-    # Hash password
-    hashed_password = hash_password(user_data.password)
-    
-    # Create user
-    user = await db.user.create(
-        data={
-            "name": user_data.name,
-            "email": user_data.email,
-            "phone": user_data.phone,
-            "password": hashed_password,
-            "role": user_data.role
-        }
-    )
+    # Hash password off the event loop
+    hashed_password = await hash_password_async(user_data.password)
+    
+    # Create user and bump the user total atomically
+    async with db.tx() as transaction:
+        user = await transaction.user.create(
+            data={
+                "name": user_data.name,
+                "email": user_data.email,
+                "phone": user_data.phone,
+                "password": hashed_password,
+                "role": user_data.role
+            }
+        )
+        await counters.apply_deltas(transaction, counters.user_deltas(user.id, 1))
+    
+    # The new user's first reads must not miss the row on a lagging replica
+    track_write(request, user.id)
     
     return user
 
@@ -70,7 +80,7 @@ async def login(credentials: LoginRequest):
     # Find user by email
     user = await db.user.find_unique(where={"email": credentials.email})
     
-    if not user or not verify_password(credentials.password, user.password):
+    if not user or not await verify_password_async(credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -136,14 +146,26 @@ async def refresh_token(refresh_data: RefreshRequest):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user = Depends(get_current_user)):
+async def get_current_user_info(
+    request: Request,
+    response: Response,
+    current_user = Depends(get_current_user)
+):
     """
     Get current authenticated user information.
     
+    The response carries a strong ETag; a matching If-None-Match gets 304.
+    
     Args:
+        request: Current request
+        response: Response whose ETag is set
         current_user: Current authenticated user from JWT
         
     Returns:
-        Current user object
+        Current user object, or 304 Not Modified
     """
+    not_modified = etags.not_modified(request, response, etags.resource_etag(current_user, UserResponse))
+    if not_modified is not None:
+        return not_modified
+    
     return current_user
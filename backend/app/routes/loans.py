@@ -1,15 +1,36 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import Optional
+import uuid
+from collections import Counter
+from datetime import timedelta
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status, Depends
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from app.models.schemas import (
     LoanCreate,
     LoanUpdate,
     LoanResponse,
-    LoanListResponse
+    LoanListResponse,
+    LoanBulkItemResult,
+    LoanBulkResponse,
+    AmortizationInstallment,
+    AmortizationScheduleResponse,
+    LoanRepriceRequest,
+    LoanRepriceResponse
 )
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_read_db, require_admin
+from app import etags
+from app.config import settings
 from app.database import db
+from app.fieldsets import loan_fields
+from app.includes import load_loan_relations, parse_include
+from app.pagination import keyset_where, keyset_order, paginate, iter_keyset_batches
+from app.responses import item_response, list_response
+from app.services import amortization, analytics, counters, export, loan_totals, repricing
+from app.middleware.timing import TimedRoute
 
-router = APIRouter(prefix="/loans", tags=["Loans"])
+router = APIRouter(prefix="/loans", tags=["Loans"], route_class=TimedRoute)
+
+# Loan fields tracked by the list counters and portfolio analytics
+_SUMMARY_FIELDS = {"status", "amount", "startDate"}
 
 
 @router.post("", response_model=LoanResponse, status_code=status.HTTP_201_CREATED)
@@ -38,9 +59,79 @@ async def create_loan(
             detail="User not found"
         )
     
-    # Create loan
-    loan = await db.loan.create(
-        data={
+    # Create loan and bump list totals and analytics atomically
+    async with db.tx() as transaction:
+        loan = await transaction.loan.create(
+            data={
+                "borrowerName": loan_data.borrowerName,
+                "amount": loan_data.amount,
+                "interestRate": loan_data.interestRate,
+                "loanTerm": loan_data.loanTerm,
+                "startDate": loan_data.startDate,
+                "status": loan_data.status,
+                "monthlyPayment": loan_data.monthlyPayment,
+                "outstandingBalance": loan_data.amount,
+                "userId": loan_data.userId
+            }
+        )
+        await counters.apply_deltas(
+            transaction,
+            counters.loan_deltas(loan.userId, loan.status, 1)
+        )
+        summary_deltas = {}
+        analytics.add_loan(summary_deltas, loan.userId, loan.status, loan.startDate, loan.amount)
+        await analytics.apply_deltas(transaction, summary_deltas)
+    
+    return loan
+
+
+@router.post("/bulk", response_model=LoanBulkResponse)
+async def create_loans_bulk(
+    loans_data: List[LoanCreate],
+    current_user = Depends(get_current_user)
+):
+    """
+    Create many loans in one request.
+    
+    Referenced users are checked with a single query and rows are inserted
+    with `create_many` in chunks of BULK_CHUNK_SIZE inside one transaction.
+    Items whose user does not exist are reported and skipped.
+    
+    Args:
+        loans_data: Loans to create
+        current_user: Current authenticated user
+        
+    Returns:
+        Per-item results (by request index) and created/failed counts
+        
+    Raises:
+        HTTPException: If more than BULK_MAX_ITEMS loans are sent
+    """
+    if len(loans_data) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_MAX_ITEMS} loans per request"
+        )
+    
+    # Verify all referenced users exist with one query
+    user_ids = list({loan_data.userId for loan_data in loans_data})
+    users = await db.user.find_many(where={"id": {"in": user_ids}}) if user_ids else []
+    existing_user_ids = {user.id for user in users}
+    
+    results = []
+    rows = []
+    created_by_owner = Counter()
+    summary_deltas = {}
+    
+    for index, loan_data in enumerate(loans_data):
+        if loan_data.userId not in existing_user_ids:
+            results.append(LoanBulkItemResult(index=index, error="User not found"))
+            continue
+        
+        # IDs are assigned here because create_many does not return rows
+        loan_id = str(uuid.uuid4())
+        rows.append({
+            "id": loan_id,
             "borrowerName": loan_data.borrowerName,
             "amount": loan_data.amount,
             "interestRate": loan_data.interestRate,
@@ -48,78 +139,223 @@ async def create_loan(
             "startDate": loan_data.startDate,
             "status": loan_data.status,
             "monthlyPayment": loan_data.monthlyPayment,
+            "outstandingBalance": loan_data.amount,
             "userId": loan_data.userId
-        }
+        })
+        created_by_owner[(loan_data.userId, loan_data.status)] += 1
+        analytics.add_loan(
+            summary_deltas, loan_data.userId, loan_data.status, loan_data.startDate, loan_data.amount
+        )
+        results.append(LoanBulkItemResult(index=index, id=loan_id))
+    
+    if rows:
+        async with db.tx(timeout=timedelta(seconds=settings.BULK_TX_TIMEOUT_SECONDS)) as transaction:
+            for start in range(0, len(rows), settings.BULK_CHUNK_SIZE):
+                await transaction.loan.create_many(
+                    data=rows[start:start + settings.BULK_CHUNK_SIZE]
+                )
+            await counters.apply_deltas(
+                transaction,
+                counters.merge(*(
+                    counters.loan_deltas(user_id, loan_status, count)
+                    for (user_id, loan_status), count in created_by_owner.items()
+                ))
+            )
+            await analytics.apply_deltas(transaction, summary_deltas)
+    
+    return LoanBulkResponse(
+        results=results,
+        created=len(rows),
+        failed=len(results) - len(rows)
     )
+
+
+@router.post("/reprice", response_model=LoanRepriceResponse)
+async def reprice_loans(
+    reprice_data: LoanRepriceRequest,
+    current_user = Depends(require_admin)
+):
+    """
+    Reprice a rate tier (admin only).
     
-    return loan
+    Every loan matching the filter gets the new interest rate and a
+    recomputed monthlyPayment, written in chunked transactions that lock
+    and re-read their loans first; loans updated out of the filter or
+    deleted meanwhile are skipped. For very large books prefer
+    `scripts/reprice_loans.py`, which prints progress.
+    
+    Args:
+        reprice_data: New rate and loan filter
+        current_user: Current authenticated admin user
+        
+    Returns:
+        Matched/updated/skipped counts and throughput
+    """
+    where_conditions = {}
+    
+    if reprice_data.currentRate is not None:
+        where_conditions["interestRate"] = reprice_data.currentRate
+    
+    if reprice_data.status:
+        where_conditions["status"] = reprice_data.status
+    
+    if reprice_data.userId:
+        where_conditions["userId"] = reprice_data.userId
+    
+    summary = await repricing.reprice_loans(
+        db,
+        where_conditions,
+        reprice_data.interestRate,
+        settings.REPRICE_CHUNK_SIZE
+    )
+    
+    return LoanRepriceResponse(**summary)
 
 
 @router.get("", response_model=LoanListResponse)
 async def get_loans(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     user_id: Optional[str] = None,
-    current_user = Depends(get_current_user)
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    payments_limit: int = Query(settings.INCLUDE_PAYMENTS_LIMIT, ge=1, le=settings.INCLUDE_PAYMENTS_MAX),
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
     Get list of loans with optional filters.
     
+    Pages are ordered by (createdAt, id) descending. Pass the returned
+    `next_cursor` as `cursor` to fetch the next page; `skip` is still
+    honoured when no cursor is given. Pages carry a weak ETag and honour
+    If-None-Match. Included relations are loaded for the whole page with
+    one query each.
+    
     Args:
-        skip: Number of records to skip
+        request: Current request
+        skip: Number of records to skip (ignored when cursor is set)
         limit: Maximum number of records to return
+        cursor: Opaque keyset cursor from a previous page
         status: Optional filter by loan status
         user_id: Optional filter by user ID
+        include_total: Whether to return the total count (read from counters)
+        fields: Optional comma-separated fields to return (default: all)
+        include: Optional comma-separated relations to embed ("payments", "user")
+        payments_limit: Maximum payments embedded per loan (newest first)
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        List of loans and total count
+        List of loans and total count, or 304 Not Modified
     """
-    # Build filter conditions
-    where_conditions = {}
-    
-    if status:
-        where_conditions["status"] = status
-    
-    if user_id:
-        where_conditions["userId"] = user_id
+    fieldset = loan_fields.select(fields)
+    relations = parse_include(include)
+    where_conditions = _loan_filters(status, user_id, current_user)
     
-    # Non-admin users can only see their own loans
-    if current_user.role != "admin":
-        where_conditions["userId"] = current_user.id
+    page_conditions = dict(where_conditions)
+    if cursor:
+        page_conditions.update(keyset_where(cursor, "createdAt"))
+        skip = 0
     
-    loans = await db.loan.find_many(
-        where=where_conditions if where_conditions else None,
+    loans = await fieldset.actions(reader).find_many(
+        where=page_conditions if page_conditions else None,
         skip=skip,
-        take=limit,
-        order={"createdAt": "desc"}
+        take=limit + 1,
+        order=keyset_order("createdAt")
     )
+    loans, next_cursor = paginate(loans, limit, "createdAt")
+    embedded = await load_loan_relations(reader, loans, relations, payments_limit)
     
-    total = await db.loan.count(where=where_conditions if where_conditions else None)
+    total = None
+    if include_total:
+        total = await counters.count_loans(
+            reader,
+            user_id=where_conditions.get("userId"),
+            status=status
+        )
     
-    return LoanListResponse(loans=loans, total=total)
+    return list_response(request, "loans", loans, fieldset.response_model, total, next_cursor, embedded)
+
+
+@router.get("/export")
+async def export_loans(
+    fmt: str = Query(export.CSV, alias="format", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    user_id: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
+):
+    """
+    Stream every matching loan as CSV or NDJSON.
+    
+    Rows are read in keyset batches of EXPORT_BATCH_SIZE and written out as
+    they arrive, so memory stays bounded however large the book is. The
+    same ownership rules as `GET /loans` apply.
+    
+    Args:
+        fmt: Output format, "csv" or "ndjson" (query parameter `format`)
+        status: Optional filter by loan status
+        user_id: Optional filter by user ID
+        current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
+        
+    Returns:
+        Streaming response with one record per loan
+    """
+    batches = iter_keyset_batches(
+        reader.loan,
+        _loan_filters(status, user_id, current_user),
+        "createdAt",
+        settings.EXPORT_BATCH_SIZE
+    )
+    
+    return StreamingResponse(
+        export.stream_rows(batches, list(LoanResponse.model_fields), fmt),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="loans.{fmt}"'}
+    )
 
 
 @router.get("/{loan_id}", response_model=LoanResponse)
 async def get_loan(
     loan_id: str,
-    current_user = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    payments_limit: int = Query(settings.INCLUDE_PAYMENTS_LIMIT, ge=1, le=settings.INCLUDE_PAYMENTS_MAX),
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
     Get loan by ID.
     
+    The response carries a strong ETag; a matching If-None-Match gets 304.
+    
     Args:
         loan_id: Loan ID
+        request: Current request
+        response: Response whose ETag is set
+        fields: Optional comma-separated fields to return (default: all)
+        include: Optional comma-separated relations to embed ("payments", "user")
+        payments_limit: Maximum payments embedded (newest first)
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        Loan object
+        Loan object, or 304 Not Modified
         
     Raises:
         HTTPException: If loan not found or unauthorized
     """
-    loan = await db.loan.find_unique(where={"id": loan_id})
+    fieldset = loan_fields.select(fields)
+    relations = parse_include(include)
+    loan = await fieldset.actions(reader).find_unique(where={"id": loan_id})
     
     if not loan:
         raise HTTPException(
@@ -134,30 +370,46 @@ async def get_loan(
             detail="Not authorized to view this loan"
         )
     
+    embedded = await load_loan_relations(reader, [loan], relations, payments_limit)
+    etag = etags.resource_etag(
+        loan,
+        fieldset.response_model,
+        embedded.version_key() if embedded is not None else ""
+    )
+    not_modified = etags.not_modified(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    if fieldset.sparse or embedded is not None:
+        return item_response(loan, fieldset.response_model, response.headers, embedded)
     return loan
 
 
-@router.put("/{loan_id}", response_model=LoanResponse)
-async def update_loan(
+@router.get("/{loan_id}/schedule", response_model=AmortizationScheduleResponse)
+async def get_loan_schedule(
     loan_id: str,
-    loan_data: LoanUpdate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
-    Update loan information.
+    Get the full amortization schedule of a loan.
+    
+    The schedule is derived from amount, interestRate, loanTerm and
+    startDate (not the stored monthlyPayment) and is cached per process
+    for loans sharing the same terms.
     
     Args:
         loan_id: Loan ID
-        loan_data: Updated loan data
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        Updated loan object
+        Per-period payment, principal, interest and balance
         
     Raises:
         HTTPException: If loan not found or unauthorized
     """
-    loan = await db.loan.find_unique(where={"id": loan_id})
+    loan = await reader.loan.find_unique(where={"id": loan_id})
     
     if not loan:
         raise HTTPException(
@@ -165,22 +417,117 @@ async def update_loan(
             detail="Loan not found"
         )
     
-    # Non-admin users can only update their own loans
+    # Non-admin users can only view their own loans
     if current_user.role != "admin" and loan.userId != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this loan"
+            detail="Not authorized to view this loan"
+        )
+    
+    schedule = amortization.build_schedule(
+        loan.amount, loan.interestRate, loan.loanTerm, loan.startDate
+    )
+    
+    installments = [
+        AmortizationInstallment(
+            number=number,
+            dueDate=due_date,
+            payment=payment,
+            principal=principal,
+            interest=interest,
+            balance=balance
+        )
+        for number, due_date, payment, principal, interest, balance in zip(
+            range(1, loan.loanTerm + 1),
+            schedule.due_dates.tolist(),
+            schedule.payment.round(2).tolist(),
+            schedule.principal.round(2).tolist(),
+            schedule.interest.round(2).tolist(),
+            schedule.balance.round(2).tolist()
         )
+    ]
     
+    return AmortizationScheduleResponse(
+        loanId=loan.id,
+        monthlyPayment=round(float(schedule.payment[0]), 2),
+        totalPayment=round(float(schedule.payment.sum()), 2),
+        totalInterest=round(float(schedule.interest.sum()), 2),
+        installments=installments
+    )
+
+
+@router.put("/{loan_id}", response_model=LoanResponse)
+async def update_loan(
+    loan_id: str,
+    loan_data: LoanUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user)
+):
+    """
+    Update loan information.
+    
+    The ownership check is part of the write itself; the loan is only
+    looked up again when the write matched nothing. With If-Match, the
+    version named by the ETag is a condition of the write too.
+    
+    Args:
+        loan_id: Loan ID
+        loan_data: Updated loan data
+        response: Response whose ETag is set
+        if_match: Optional ETag(s) the loan must still have
+        current_user: Current authenticated user
+        
+    Returns:
+        Updated loan object
+        
+    Raises:
+        HTTPException: If loan not found, unauthorized, or modified since
+            the If-Match version (412)
+    """
     # Prepare update data
     update_data = loan_data.model_dump(exclude_unset=True)
+    where = _owned_loan_where(loan_id, current_user)
+    versions = etags.if_match_versions(if_match)
+    if versions is not None:
+        where["updatedAt"] = {"in": versions}
     
-    # Update loan
-    updated_loan = await db.loan.update(
-        where={"id": loan_id},
-        data=update_data
-    )
+    if not _SUMMARY_FIELDS.intersection(update_data):
+        updated_loan = await db.loan.update(where=where, data=update_data)
+        if updated_loan is None:
+            await _raise_loan_write_error(loan_id, "update", current_user if versions else None)
+        etags.set_etag(response, updated_loan, LoanResponse)
+        return updated_loan
     
+    # Status, amount and startDate changes move the loan between counters
+    # and analytics buckets, so the previous values are read in the same
+    # transaction, with the loan locked against concurrent payment postings
+    async with db.tx() as transaction:
+        # Only the user's own loans are locked; others fail below
+        await loan_totals.lock_loans(transaction, [loan_id], _owner_id(current_user))
+        loan = await transaction.loan.find_first(where=where)
+        if loan is None:
+            await _raise_loan_write_error(loan_id, "update", current_user if versions else None)
+        
+        if "amount" in update_data:
+            update_data["outstandingBalance"] = update_data["amount"] - loan.paidAmount
+        
+        updated_loan = await transaction.loan.update(
+            where={"id": loan_id},
+            data=update_data
+        )
+        await counters.apply_deltas(
+            transaction,
+            counters.status_change_deltas(
+                counters.loan_deltas, loan.status, updated_loan.status, loan.userId
+            )
+        )
+        await analytics.apply_deltas(
+            transaction,
+            analytics.loan_change_deltas(loan, updated_loan)
+        )
+    
+    etags.set_etag(response, updated_loan, LoanResponse)
     return updated_loan
 
 
@@ -199,19 +546,105 @@ async def delete_loan(
     Raises:
         HTTPException: If loan not found or unauthorized
     """
-    loan = await db.loan.find_unique(where={"id": loan_id})
+    async with db.tx() as transaction:
+        # Payments cascade with the loan, so lock it and tally them first.
+        # Ownership is part of the lock, so nothing is locked or counted
+        # for other users' loans.
+        if not await loan_totals.lock_loans(transaction, [loan_id], _owner_id(current_user)):
+            await _raise_loan_write_error(loan_id, "delete")
+        payment_counts = await counters.loan_payment_counts(transaction, loan_id)
+        
+        loan = await transaction.loan.delete(where=_owned_loan_where(loan_id, current_user))
+        
+        await counters.forget_loan(transaction, loan, payment_counts)
+        summary_deltas = {}
+        analytics.add_loan(
+            summary_deltas, loan.userId, loan.status, loan.startDate, loan.amount, sign=-1, paid=loan.paidAmount
+        )
+        await analytics.apply_deltas(transaction, summary_deltas)
+
+
+def _loan_filters(status: Optional[str], user_id: Optional[str], current_user) -> dict:
+    """
+    Build list filter conditions, enforcing ownership for non-admins.
     
-    if not loan:
+    Args:
+        status: Optional filter by loan status
+        user_id: Optional filter by user ID
+        current_user: Current authenticated user
+        
+    Returns:
+        Prisma where conditions
+    """
+    where_conditions = {}
+    
+    if status:
+        where_conditions["status"] = status
+    
+    if user_id:
+        where_conditions["userId"] = user_id
+    
+    # Non-admin users can only see their own loans
+    if current_user.role != "admin":
+        where_conditions["userId"] = current_user.id
+    
+    return where_conditions
+
+
+def _owner_id(current_user) -> Optional[str]:
+    """Owner a user's loan writes are restricted to (None for admins)."""
+    return None if current_user.role == "admin" else current_user.id
+
+
+def _owned_loan_where(loan_id: str, current_user) -> dict:
+    """
+    Build a unique filter matching the loan only if the user may modify it.
+    
+    Args:
+        loan_id: Loan ID
+        current_user: Current authenticated user
+        
+    Returns:
+        Prisma where conditions (ID plus owner for non-admins)
+    """
+    where = {"id": loan_id}
+    
+    # Non-admin users can only modify their own loans
+    if current_user.role != "admin":
+        where["userId"] = current_user.id
+    
+    return where
+
+
+async def _raise_loan_write_error(loan_id: str, action: str, conditional_user=None) -> None:
+    """
+    Explain why an owner-scoped write matched no loan.
+    
+    Args:
+        loan_id: Loan ID
+        action: Attempted action ("update" or "delete")
+        conditional_user: Current user when the write carried If-Match
+        
+    Raises:
+        HTTPException: 404 if the loan does not exist, 412 if the user may
+            write it but its version changed, 403 otherwise
+    """
+    loan = await db.loan.find_unique(where={"id": loan_id})
+    if loan is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Loan not found"
         )
     
-    # Non-admin users can only delete their own loans
-    if current_user.role != "admin" and loan.userId != current_user.id:
+    if conditional_user is not None and (
+        conditional_user.role == "admin" or loan.userId == conditional_user.id
+    ):
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this loan"
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Loan was modified since it was read"
         )
     
-    await db.loan.delete(where={"id": loan_id})
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this loan"
+    )
@@ -1,15 +1,34 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import Optional
+import json
+import uuid
+from collections import Counter
+from datetime import timedelta
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status, Depends
+from fastapi.responses import StreamingResponse
+from prisma.errors import PrismaError
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+from typing import AsyncIterator, List, Optional, Tuple
 from app.models.schemas import (
     PaymentCreate,
     PaymentUpdate,
     PaymentResponse,
-    PaymentListResponse
+    PaymentListResponse,
+    PaymentIngestResult
 )
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_read_db
+from app import etags
+from app.config import settings
 from app.database import db
+from app.fieldsets import payment_fields
+from app.pagination import keyset_where, keyset_order, paginate, iter_keyset_batches
+from app.responses import DuplexStreamingResponse, item_response, list_response
+from app.services import analytics, counters, export, loan_totals
+from app.middleware.timing import TimedRoute
 
-router = APIRouter(prefix="/payments", tags=["Payments"])
+router = APIRouter(prefix="/payments", tags=["Payments"], route_class=TimedRoute)
+
+# Payment fields tracked by counters, loan totals and portfolio analytics
+_TOTALS_FIELDS = {"status", "amount", "date"}
 
 
 @router.post("", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
@@ -45,100 +64,365 @@ async def create_payment(
             detail="Not authorized to create payment for this loan"
         )
     
-    # Create payment
-    payment = await db.payment.create(
-        data={
+    # Create payment and bump list totals, loan totals and analytics
+    # atomically; only this loan's row is locked
+    async with db.tx() as transaction:
+        locked_loans = await loan_totals.lock_loans(transaction, [loan.id])
+        if not locked_loans:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Loan not found"
+            )
+        loan = locked_loans[0]
+        
+        payment = await transaction.payment.create(
+            data={
+                "loanId": payment_data.loanId,
+                "amount": payment_data.amount,
+                "date": payment_data.date,
+                "status": payment_data.status
+            }
+        )
+        await counters.apply_deltas(
+            transaction,
+            counters.payment_deltas(loan.id, loan.userId, payment.status, 1)
+        )
+        totals_deltas = {}
+        loan_totals.add_payment(totals_deltas, payment)
+        await loan_totals.apply_deltas(transaction, totals_deltas)
+        summary_deltas = {}
+        analytics.add_paid(
+            summary_deltas, loan.userId, loan.status, loan.startDate, analytics.completed_amount(payment)
+        )
+        await analytics.apply_deltas(transaction, summary_deltas)
+    
+    return payment
+
+
+@router.post("/ingest")
+async def ingest_payments(
+    request: Request,
+    current_user = Depends(get_current_user)
+):
+    """
+    Ingest payments from an NDJSON body (one PaymentCreate object per line).
+    
+    The body is parsed as it arrives, in chunks of BULK_CHUNK_SIZE lines.
+    Each chunk checks its loans with one query, inserts with `create_many`
+    and, once committed, its results are sent while the rest of the body
+    is still being read: one NDJSON PaymentIngestResult per input line
+    (status "created" or "error"), then a summary line. Only one chunk of
+    lines and results is held in memory at a time.
+    
+    Args:
+        request: Incoming request carrying the NDJSON body
+        current_user: Current authenticated user
+        
+    Returns:
+        Streaming NDJSON response with per-line results
+    """
+    return DuplexStreamingResponse(
+        _ingest_results(request, current_user),
+        media_type="application/x-ndjson"
+    )
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield body lines without buffering more than one partial line."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def _iter_batches(request: Request) -> AsyncIterator[List[Tuple[int, bytes]]]:
+    """Yield non-blank body lines with their line numbers, BULK_CHUNK_SIZE at a time."""
+    batch: List[Tuple[int, bytes]] = []
+    line_number = 0
+    async for line in _iter_lines(request):
+        line_number += 1
+        if line.strip():
+            batch.append((line_number, line))
+        
+        if len(batch) >= settings.BULK_CHUNK_SIZE:
+            yield batch
+            batch = []
+    
+    if batch:
+        yield batch
+
+
+async def _ingest_results(request: Request, current_user) -> AsyncIterator[str]:
+    """
+    Insert NDJSON payments chunk by chunk, yielding each chunk's results.
+    
+    Args:
+        request: Incoming request carrying the NDJSON body
+        current_user: Current authenticated user
+        
+    Yields:
+        Encoded result lines of one committed chunk, then the summary line
+    """
+    created = 0
+    failed = 0
+    
+    try:
+        async for batch in _iter_batches(request):
+            results = await _ingest_batch(batch, current_user)
+            chunk_created = sum(result.status == "created" for result in results)
+            created += chunk_created
+            failed += len(results) - chunk_created
+            yield "".join(result.model_dump_json(exclude_none=True) + "\n" for result in results)
+    except ClientDisconnect:
+        # Committed chunks stay; nobody is left to read the results
+        return
+    
+    yield json.dumps({"summary": {"created": created, "failed": failed}}) + "\n"
+
+
+async def _ingest_batch(batch: List[Tuple[int, bytes]], current_user) -> List[PaymentIngestResult]:
+    """
+    Validate and insert one chunk of NDJSON payment lines.
+    
+    Args:
+        batch: (line number, raw line) pairs
+        current_user: Current authenticated user
+        
+    Returns:
+        One result per line, in input order
+    """
+    results = []
+    parsed = []
+    
+    for line_number, line in batch:
+        try:
+            parsed.append((line_number, PaymentCreate.model_validate_json(line)))
+        except ValidationError as e:
+            error = "; ".join(err["msg"] for err in e.errors())
+            results.append(PaymentIngestResult(line=line_number, status="error", error=error))
+    
+    # Check every referenced loan with one query
+    loan_ids = list({payment_data.loanId for _, payment_data in parsed})
+    loans = await db.loan.find_many(where={"id": {"in": loan_ids}}) if loan_ids else []
+    loans_by_id = {loan.id: loan for loan in loans}
+    
+    rows = []
+    created_by_loan = Counter()
+    paid_by_loan = Counter()
+    totals_deltas = {}
+    accepted = []
+    
+    for line_number, payment_data in parsed:
+        loan = loans_by_id.get(payment_data.loanId)
+        
+        if loan is None:
+            results.append(PaymentIngestResult(line=line_number, status="error", error="Loan not found"))
+            continue
+        
+        # Non-admin users can only create payments for their own loans
+        if current_user.role != "admin" and loan.userId != current_user.id:
+            results.append(PaymentIngestResult(
+                line=line_number,
+                status="error",
+                error="Not authorized to create payment for this loan"
+            ))
+            continue
+        
+        payment_id = str(uuid.uuid4())
+        rows.append({
+            "id": payment_id,
             "loanId": payment_data.loanId,
             "amount": payment_data.amount,
             "date": payment_data.date,
             "status": payment_data.status
-        }
-    )
+        })
+        created_by_loan[(loan.id, loan.userId, payment_data.status)] += 1
+        paid_by_loan[loan.id] += analytics.completed_amount(payment_data)
+        loan_totals.add_payment(totals_deltas, payment_data)
+        accepted.append((line_number, payment_id))
     
-    return payment
+    if rows:
+        try:
+            async with db.tx(timeout=timedelta(seconds=settings.BULK_TX_TIMEOUT_SECONDS)) as transaction:
+                # Analytics buckets come from the locked rows, which a
+                # concurrent loan update can no longer move
+                locked_loans = await loan_totals.lock_loans(transaction, paid_by_loan)
+                await transaction.payment.create_many(data=rows)
+                await counters.apply_deltas(
+                    transaction,
+                    counters.merge(*(
+                        counters.payment_deltas(loan_id, owner_id, payment_status, count)
+                        for (loan_id, owner_id, payment_status), count in created_by_loan.items()
+                    ))
+                )
+                await loan_totals.apply_deltas(transaction, totals_deltas)
+                summary_deltas = {}
+                for loan in locked_loans:
+                    analytics.add_paid(
+                        summary_deltas, loan.userId, loan.status, loan.startDate, paid_by_loan[loan.id]
+                    )
+                await analytics.apply_deltas(transaction, summary_deltas)
+            results.extend(
+                PaymentIngestResult(line=line_number, status="created", id=payment_id)
+                for line_number, payment_id in accepted
+            )
+        except PrismaError:
+            # The whole chunk was rolled back
+            results.extend(
+                PaymentIngestResult(line=line_number, status="error", error="Database error")
+                for line_number, _ in accepted
+            )
+    
+    results.sort(key=lambda result: result.line)
+    return results
 
 
 @router.get("", response_model=PaymentListResponse)
 async def get_payments(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     loan_id: Optional[str] = None,
-    current_user = Depends(get_current_user)
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
     Get list of payments with optional filters.
     
+    Pages are ordered by (date, id) descending. Pass the returned
+    `next_cursor` as `cursor` to fetch the next page; `skip` is still
+    honoured when no cursor is given. Pages carry a weak ETag and honour
+    If-None-Match.
+    
     Args:
-        skip: Number of records to skip
+        request: Current request
+        skip: Number of records to skip (ignored when cursor is set)
         limit: Maximum number of records to return
+        cursor: Opaque keyset cursor from a previous page
         status: Optional filter by payment status
         loan_id: Optional filter by loan ID
+        include_total: Whether to return the total count (read from counters)
+        fields: Optional comma-separated fields to return (default: all)
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        List of payments and total count
+        List of payments and total count, or 304 Not Modified
     """
-    # Build filter conditions
-    where_conditions = {}
+    fieldset = payment_fields.select(fields)
+    where_conditions = _payment_filters(status, loan_id, current_user)
     
-    if status:
-        where_conditions["status"] = status
+    page_conditions = dict(where_conditions)
+    if cursor:
+        page_conditions.update(keyset_where(cursor, "date"))
+        skip = 0
     
-    if loan_id:
-        where_conditions["loanId"] = loan_id
+    payments = await fieldset.actions(reader).find_many(
+        where=page_conditions if page_conditions else None,
+        skip=skip,
+        take=limit + 1,
+        order=keyset_order("date")
+    )
+    payments, next_cursor = paginate(payments, limit, "date")
     
-    # Non-admin users can only see payments for their own loans
-    if current_user.role != "admin":
-        # Get user's loan IDs
-        user_loans = await db.loan.find_many(
-            where={"userId": current_user.id},
-            select={"id": True}
-        )
-        loan_ids = [loan.id for loan in user_loans]
-        
-        if loan_ids:
-            where_conditions["loanId"] = {"in": loan_ids}
+    total = None
+    if include_total:
+        if current_user.role == "admin":
+            total = await counters.count_payments(reader, loan_id=loan_id, status=status)
+        elif loan_id:
+            # The loan counter can't tell whether the loan is the caller's
+            total = await reader.payment.count(where=where_conditions)
         else:
-            # User has no loans, return empty list
-            return PaymentListResponse(payments=[], total=0)
+            total = await counters.count_payments(reader, owner_id=current_user.id, status=status)
     
-    payments = await db.payment.find_many(
-        where=where_conditions if where_conditions else None,
-        skip=skip,
-        take=limit,
-        order={"date": "desc"}
-    )
+    return list_response(request, "payments", payments, fieldset.response_model, total, next_cursor)
+
+
+@router.get("/export")
+async def export_payments(
+    fmt: str = Query(export.CSV, alias="format", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    loan_id: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
+):
+    """
+    Stream every matching payment as CSV or NDJSON.
     
-    total = await db.payment.count(where=where_conditions if where_conditions else None)
+    Rows are read in keyset batches of EXPORT_BATCH_SIZE and written out as
+    they arrive, so memory stays bounded however many payments match. The
+    same ownership rules as `GET /payments` apply.
     
-    return PaymentListResponse(payments=payments, total=total)
+    Args:
+        fmt: Output format, "csv" or "ndjson" (query parameter `format`)
+        status: Optional filter by payment status
+        loan_id: Optional filter by loan ID
+        current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
+        
+    Returns:
+        Streaming response with one record per payment
+    """
+    batches = iter_keyset_batches(
+        reader.payment,
+        _payment_filters(status, loan_id, current_user),
+        "date",
+        settings.EXPORT_BATCH_SIZE
+    )
+    
+    return StreamingResponse(
+        export.stream_rows(batches, list(PaymentResponse.model_fields), fmt),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="payments.{fmt}"'}
+    )
 
 
 @router.get("/loan/{loan_id}", response_model=PaymentListResponse)
 async def get_payments_by_loan(
     loan_id: str,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    current_user = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
     Get all payments for a specific loan.
     
+    Pages are ordered by (date, id) descending; see `get_payments`.
+    
     Args:
         loan_id: Loan ID
-        skip: Number of records to skip
+        request: Current request
+        skip: Number of records to skip (ignored when cursor is set)
         limit: Maximum number of records to return
+        cursor: Opaque keyset cursor from a previous page
+        include_total: Whether to return the total count (read from counters)
+        fields: Optional comma-separated fields to return (default: all)
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        List of payments for the loan
+        List of payments for the loan, or 304 Not Modified
         
     Raises:
         HTTPException: If loan not found or unauthorized
     """
+    fieldset = payment_fields.select(fields)
+    
     # Verify loan exists
-    loan = await db.loan.find_unique(where={"id": loan_id})
+    loan = await reader.loan.find_unique(where={"id": loan_id})
     if not loan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -152,37 +436,57 @@ async def get_payments_by_loan(
             detail="Not authorized to view payments for this loan"
         )
     
-    payments = await db.payment.find_many(
-        where={"loanId": loan_id},
+    page_conditions = {"loanId": loan_id}
+    if cursor:
+        page_conditions.update(keyset_where(cursor, "date"))
+        skip = 0
+    
+    payments = await fieldset.actions(reader).find_many(
+        where=page_conditions,
         skip=skip,
-        take=limit,
-        order={"date": "desc"}
+        take=limit + 1,
+        order=keyset_order("date")
     )
+    payments, next_cursor = paginate(payments, limit, "date")
     
-    total = await db.payment.count(where={"loanId": loan_id})
+    total = None
+    if include_total:
+        total = await counters.count_payments(reader, loan_id=loan_id)
     
-    return PaymentListResponse(payments=payments, total=total)
+    return list_response(request, "payments", payments, fieldset.response_model, total, next_cursor)
 
 
 @router.get("/{payment_id}", response_model=PaymentResponse)
 async def get_payment(
     payment_id: str,
-    current_user = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
     Get payment by ID.
     
+    The response carries a strong ETag; a matching If-None-Match gets 304.
+    
     Args:
         payment_id: Payment ID
+        request: Current request
+        response: Response whose ETag is set
+        fields: Optional comma-separated fields to return (default: all)
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        Payment object
+        Payment object, or 304 Not Modified
         
     Raises:
         HTTPException: If payment not found or unauthorized
     """
-    payment = await db.payment.find_unique(
+    # The loan is read for the ownership check
+    fieldset = payment_fields.select(fields, "loan")
+    payment = await fieldset.actions(reader).find_unique(
         where={"id": payment_id},
         include={"loan": True}
     )
@@ -200,6 +504,12 @@ async def get_payment(
             detail="Not authorized to view this payment"
         )
     
+    not_modified = etags.not_modified(request, response, etags.resource_etag(payment, fieldset.response_model))
+    if not_modified is not None:
+        return not_modified
+    
+    if fieldset.sparse:
+        return item_response(payment, fieldset.response_model, response.headers)
     return payment
 
 
@@ -207,49 +517,84 @@ async def get_payment(
 async def update_payment(
     payment_id: str,
     payment_data: PaymentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user)
 ):
     """
     Update payment information.
     
+    The ownership check is part of the write itself; the payment is only
+    looked up again when the write matched nothing. With If-Match, the
+    version named by the ETag is a condition of the write too.
+    
     Args:
         payment_id: Payment ID
         payment_data: Updated payment data
+        response: Response whose ETag is set
+        if_match: Optional ETag(s) the payment must still have
         current_user: Current authenticated user
         
     Returns:
         Updated payment object
         
     Raises:
-        HTTPException: If payment not found or unauthorized
+        HTTPException: If payment not found, unauthorized, or modified
+            since the If-Match version (412)
     """
-    payment = await db.payment.find_unique(
-        where={"id": payment_id},
-        include={"loan": True}
-    )
-    
-    if not payment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Payment not found"
-        )
-    
-    # Non-admin users can only update payments for their own loans
-    if current_user.role != "admin" and payment.loan.userId != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this payment"
-        )
-    
     # Prepare update data
     update_data = payment_data.model_dump(exclude_unset=True)
+    where = _owned_payment_where(payment_id, current_user)
+    versions = etags.if_match_versions(if_match)
+    if versions is not None:
+        where["updatedAt"] = {"in": versions}
     
-    # Update payment
-    updated_payment = await db.payment.update(
-        where={"id": payment_id},
-        data=update_data
-    )
+    if not _TOTALS_FIELDS.intersection(update_data):
+        updated_payment = await db.payment.update(where=where, data=update_data)
+        if updated_payment is None:
+            await _raise_payment_write_error(payment_id, "update", current_user if versions else None)
+        etags.set_etag(response, updated_payment, PaymentResponse)
+        return updated_payment
     
+    # Status, amount and date changes move counters and paid totals, so
+    # the loan is locked and the previous payment read in the same
+    # transaction
+    async with db.tx() as transaction:
+        # Other users' loans are not locked; their payments fail below
+        await loan_totals.lock_payment_loan(transaction, payment_id, _owner_id(current_user))
+        payment = await transaction.payment.find_first(where=where, include={"loan": True})
+        if payment is None:
+            await _raise_payment_write_error(payment_id, "update", current_user if versions else None)
+        
+        updated_payment = await transaction.payment.update(
+            where={"id": payment_id},
+            data=update_data
+        )
+        await counters.apply_deltas(
+            transaction,
+            counters.status_change_deltas(
+                counters.payment_deltas,
+                payment.status,
+                updated_payment.status,
+                payment.loanId,
+                payment.loan.userId
+            )
+        )
+        totals_deltas = {}
+        loan_totals.add_payment(totals_deltas, payment, sign=-1)
+        loan_totals.add_payment(totals_deltas, updated_payment)
+        await loan_totals.apply_deltas(transaction, totals_deltas)
+        summary_deltas = {}
+        analytics.add_paid(
+            summary_deltas,
+            payment.loan.userId,
+            payment.loan.status,
+            payment.loan.startDate,
+            analytics.completed_amount(updated_payment) - analytics.completed_amount(payment)
+        )
+        await analytics.apply_deltas(transaction, summary_deltas)
+    
+    etags.set_etag(response, updated_payment, PaymentResponse)
     return updated_payment
 
 
@@ -268,22 +613,124 @@ async def delete_payment(
     Raises:
         HTTPException: If payment not found or unauthorized
     """
+    async with db.tx() as transaction:
+        # Other users' loans are not locked; their payments fail below
+        await loan_totals.lock_payment_loan(transaction, payment_id, _owner_id(current_user))
+        payment = await transaction.payment.delete(
+            where=_owned_payment_where(payment_id, current_user),
+            include={"loan": True}
+        )
+        if payment is None:
+            await _raise_payment_write_error(payment_id, "delete")
+        
+        await counters.apply_deltas(
+            transaction,
+            counters.payment_deltas(
+                payment.loanId,
+                payment.loan.userId,
+                payment.status,
+                -1
+            )
+        )
+        totals_deltas = {}
+        loan_totals.add_payment(totals_deltas, payment, sign=-1)
+        await loan_totals.apply_deltas(transaction, totals_deltas)
+        summary_deltas = {}
+        analytics.add_paid(
+            summary_deltas,
+            payment.loan.userId,
+            payment.loan.status,
+            payment.loan.startDate,
+            -analytics.completed_amount(payment)
+        )
+        await analytics.apply_deltas(transaction, summary_deltas)
+
+
+def _payment_filters(status: Optional[str], loan_id: Optional[str], current_user) -> dict:
+    """
+    Build list filter conditions, enforcing ownership for non-admins.
+    
+    Args:
+        status: Optional filter by payment status
+        loan_id: Optional filter by loan ID
+        current_user: Current authenticated user
+        
+    Returns:
+        Prisma where conditions
+    """
+    where_conditions = {}
+    
+    if status:
+        where_conditions["status"] = status
+    
+    if loan_id:
+        where_conditions["loanId"] = loan_id
+    
+    # Non-admin users can only see payments for their own loans; the
+    # ownership check is a join on the loan relation, not an IN list
+    if current_user.role != "admin":
+        where_conditions["loan"] = {"is": {"userId": current_user.id}}
+    
+    return where_conditions
+
+
+def _owner_id(current_user) -> Optional[str]:
+    """Loan owner a user's payment writes are restricted to (None for admins)."""
+    return None if current_user.role == "admin" else current_user.id
+
+
+def _owned_payment_where(payment_id: str, current_user) -> dict:
+    """
+    Build a unique filter matching the payment only if the user may modify it.
+    
+    Args:
+        payment_id: Payment ID
+        current_user: Current authenticated user
+        
+    Returns:
+        Prisma where conditions (ID plus loan owner for non-admins)
+    """
+    where = {"id": payment_id}
+    
+    # Non-admin users can only modify payments for their own loans
+    if current_user.role != "admin":
+        where["loan"] = {"is": {"userId": current_user.id}}
+    
+    return where
+
+
+async def _raise_payment_write_error(payment_id: str, action: str, conditional_user=None) -> None:
+    """
+    Explain why an owner-scoped write matched no payment.
+    
+    Args:
+        payment_id: Payment ID
+        action: Attempted action ("update" or "delete")
+        conditional_user: Current user when the write carried If-Match
+        
+    Raises:
+        HTTPException: 404 if the payment does not exist, 412 if the user
+            may write it but its version changed, 403 otherwise
+    """
     payment = await db.payment.find_unique(
         where={"id": payment_id},
-        include={"loan": True}
+        include={"loan": conditional_user is not None}
     )
-    
-    if not payment:
+    if payment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Payment not found"
         )
     
-    # Non-admin users can only delete payments for their own loans
-    if current_user.role != "admin" and payment.loan.userId != current_user.id:
+    if conditional_user is not None and (
+        conditional_user.role == "admin" or payment.loan.userId == conditional_user.id
+    ):
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this payment"
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Payment was modified since it was read"
         )
     
-    await db.payment.delete(where={"id": payment_id})
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this payment"
+    )
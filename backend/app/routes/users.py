@@ -1,53 +1,95 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status, Depends
+from typing import List, Optional
 from app.models.schemas import (
     UserResponse,
     UserUpdate,
     UserListResponse
 )
-from app.auth.dependencies import get_current_user, require_admin
+from app.auth.dependencies import get_current_user, get_read_db, require_admin, invalidate_principal
+from app import etags
 from app.database import db
+from app.fieldsets import user_fields
+from app.pagination import keyset_where, keyset_order, paginate
+from app.responses import item_response, list_response
+from app.services import analytics, counters
+from app.middleware.timing import TimedRoute
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=TimedRoute)
 
 
 @router.get("", response_model=UserListResponse)
 async def get_users(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    current_user = Depends(require_admin)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = None,
+    current_user = Depends(require_admin),
+    reader = Depends(get_read_db)
 ):
     """
     Get list of all users (admin only).
     
+    Pages are ordered by (createdAt, id) descending. Pass the returned
+    `next_cursor` as `cursor` to fetch the next page. Pages carry a weak
+    ETag and honour If-None-Match.
+    
     Args:
-        skip: Number of records to skip
+        request: Current request
+        skip: Number of records to skip (ignored when cursor is set)
         limit: Maximum number of records to return
+        cursor: Opaque keyset cursor from a previous page
+        include_total: Whether to return the total count (read from counters)
+        fields: Optional comma-separated fields to return (default: all)
         current_user: Current authenticated admin user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        List of users and total count
+        List of users and total count, or 304 Not Modified
     """
-    users = await db.user.find_many(skip=skip, take=limit)
-    total = await db.user.count()
+    fieldset = user_fields.select(fields)
+    page_conditions = {}
+    if cursor:
+        page_conditions.update(keyset_where(cursor, "createdAt"))
+        skip = 0
+    
+    users = await fieldset.actions(reader).find_many(
+        where=page_conditions if page_conditions else None,
+        skip=skip,
+        take=limit + 1,
+        order=keyset_order("createdAt")
+    )
+    users, next_cursor = paginate(users, limit, "createdAt")
+    total = await counters.count_users(reader) if include_total else None
     
-    return UserListResponse(users=users, total=total)
+    return list_response(request, "users", users, fieldset.response_model, total, next_cursor)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
-    current_user = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    reader = Depends(get_read_db)
 ):
     """
     Get user by ID.
     
+    The response carries a strong ETag; a matching If-None-Match gets 304.
+    
     Args:
         user_id: User ID
+        request: Current request
+        response: Response whose ETag is set
+        fields: Optional comma-separated fields to return (default: all)
         current_user: Current authenticated user
+        reader: Database client for reads (replica unless the user just wrote)
         
     Returns:
-        User object
+        User object, or 304 Not Modified
         
     Raises:
         HTTPException: If user not found or unauthorized
@@ -59,7 +101,8 @@ async def get_user(
             detail="Not authorized to view this user"
         )
     
-    user = await db.user.find_unique(where={"id": user_id})
+    fieldset = user_fields.select(fields)
+    user = await fieldset.actions(reader).find_unique(where={"id": user_id})
     
     if not user:
         raise HTTPException(
@@ -67,6 +110,12 @@ async def get_user(
             detail="User not found"
         )
     
+    not_modified = etags.not_modified(request, response, etags.resource_etag(user, fieldset.response_model))
+    if not_modified is not None:
+        return not_modified
+    
+    if fieldset.sparse:
+        return item_response(user, fieldset.response_model, response.headers)
     return user
 
 
@@ -74,21 +123,29 @@ async def get_user(
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user = Depends(get_current_user)
 ):
     """
     Update user information.
     
+    With If-Match, the version named by the ETag is a condition of the
+    write.
+    
     Args:
         user_id: User ID
         user_data: Updated user data
+        response: Response whose ETag is set
+        if_match: Optional ETag(s) the user must still have
         current_user: Current authenticated user
         
     Returns:
         Updated user object
         
     Raises:
-        HTTPException: If user not found or unauthorized
+        HTTPException: If user not found, unauthorized, or modified since
+            the If-Match version (412)
     """
     # Users can only update their own profile unless they're admin
     if current_user.id != user_id and current_user.role != "admin":
@@ -115,12 +172,30 @@ async def update_user(
             detail="Only admins can change user roles"
         )
     
+    where = {"id": user_id}
+    versions = etags.if_match_versions(if_match)
+    if versions is not None:
+        where["updatedAt"] = {"in": versions}
+    
     # Update user
     updated_user = await db.user.update(
-        where={"id": user_id},
+        where=where,
         data=update_data
     )
+    if updated_user is None:
+        # Deleted concurrently, unless only the If-Match version failed
+        if versions is None or await db.user.find_unique(where={"id": user_id}) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="User was modified since it was read"
+        )
+    invalidate_principal(user_id)
     
+    etags.set_etag(response, updated_user, UserResponse)
     return updated_user
 
 
@@ -147,4 +222,8 @@ async def delete_user(
             detail="User not found"
         )
     
-    await db.user.delete(where={"id": user_id})
+    async with db.tx() as transaction:
+        await counters.forget_user(transaction, user_id)
+        await analytics.forget_user(transaction, user_id)
+        await transaction.user.delete(where={"id": user_id})
+    invalidate_principal(user_id)
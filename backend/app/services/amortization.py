@@ -0,0 +1,130 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import NamedTuple, Union
+import numpy as np
+from app.config import settings
+
+
+class Schedule(NamedTuple):
+    """Full repayment schedule; every field is a read-only array of length `term`."""
+    due_dates: np.ndarray
+    payment: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    balance: np.ndarray
+
+
+def monthly_payments(amounts, annual_rates, terms) -> np.ndarray:
+    """
+    Level monthly payment for one or many fully amortizing loans.
+    
+    Args:
+        amounts: Principal amounts (scalar or array)
+        annual_rates: Annual interest rates in percent (scalar or array)
+        terms: Terms in months (scalar or array)
+        
+    Returns:
+        Array of monthly payments (zero-rate loans repay principal evenly)
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rates = np.asarray(annual_rates, dtype=np.float64) / 1200.0
+    terms = np.asarray(terms, dtype=np.float64)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.power(1.0 + rates, terms)
+        return np.where(
+            rates > 0,
+            amounts * rates * growth / (growth - 1.0),
+            amounts / terms
+        )
+
+
+def due_dates(start_dates, periods) -> np.ndarray:
+    """
+    Due date of installment number `periods` (1-based) for one or many loans.
+    
+    The start date's day of month is kept, clamped to the month's length.
+    
+    Args:
+        start_dates: Start dates (date, datetime64 or array of them)
+        periods: Installment numbers (scalar or array, broadcast against start_dates)
+        
+    Returns:
+        Array of datetime64[D] due dates
+    """
+    start_dates = np.asarray(start_dates, dtype="datetime64[D]")
+    start_months = start_dates.astype("datetime64[M]")
+    days = (start_dates - start_months.astype("datetime64[D]")).astype(np.int64) + 1
+    
+    months = start_months + np.asarray(periods, dtype=np.int64)
+    month_starts = months.astype("datetime64[D]")
+    month_lengths = ((months + 1).astype("datetime64[D]") - month_starts).astype(np.int64)
+    return month_starts + (np.minimum(days, month_lengths) - 1)
+
+
+def _due_dates(start: date, term: int) -> np.ndarray:
+    """Monthly due dates after `start`, keeping its day clamped to month length."""
+    return due_dates(np.datetime64(start, "D"), np.arange(1, term + 1))
+
+
+@lru_cache(maxsize=settings.SCHEDULE_CACHE_SIZE)
+def _cached_schedule(amount: float, annual_rate: float, term: int, start: date) -> Schedule:
+    rate = annual_rate / 1200.0
+    payment = float(monthly_payments(amount, annual_rate, term))
+    periods = np.arange(1, term + 1, dtype=np.float64)
+    
+    # Closed-form closing balance after each period
+    if rate > 0:
+        growth = np.power(1.0 + rate, periods)
+        balance = amount * growth - payment * (growth - 1.0) / rate
+    else:
+        balance = amount - payment * periods
+    balance = np.maximum(balance, 0.0)
+    balance[-1] = 0.0
+    
+    opening = np.concatenate(([amount], balance[:-1]))
+    interest = opening * rate
+    principal = opening - balance
+    
+    schedule = Schedule(
+        due_dates=_due_dates(start, term),
+        payment=principal + interest,
+        principal=principal,
+        interest=interest,
+        balance=balance
+    )
+    
+    # Cached arrays are shared between callers
+    for array in schedule:
+        array.flags.writeable = False
+    
+    return schedule
+
+
+def build_schedule(
+    amount: float, annual_rate: float, term: int, start_date: Union[date, datetime]
+) -> Schedule:
+    """
+    Build (or fetch from the LRU cache) a loan's amortization schedule.
+    
+    Schedules are memoized on (amount, annual_rate, term, start date), so
+    loans sharing the same terms are computed once per process.
+    
+    Args:
+        amount: Principal amount
+        annual_rate: Annual interest rate in percent
+        term: Term in months
+        start_date: Loan start date (time of day is ignored)
+        
+    Returns:
+        Schedule with per-period due dates, payment, principal, interest and closing balance
+    """
+    if isinstance(start_date, datetime):
+        start_date = start_date.date()
+    return _cached_schedule(float(amount), float(annual_rate), int(term), start_date)
+
+
+def cache_stats() -> dict:
+    """Return hit/miss counters of the schedule cache."""
+    info = _cached_schedule.cache_info()
+    return {"size": info.currsize, "maxsize": info.maxsize, "hits": info.hits, "misses": info.misses}
@@ -0,0 +1,203 @@
+"""
+Incrementally maintained portfolio analytics.
+
+`PortfolioSummary` holds, per (loan status, origination month), the number
+of loans, their total amount and the sum of their completed payments.
+Loan and payment writes apply deltas in the same transaction, so reading
+the portfolio costs one small query however large the book is.
+Outstanding principal is reported as amount minus completed payments.
+
+Each bucket is striped over SUMMARY_STRIPES rows, picked by the loan's
+owner and summed on read (as `counters` does for global totals). Postings
+against different users' loans in the same bucket therefore lock
+different rows instead of queueing behind one row until commit.
+"""
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+from prisma import Prisma
+
+COMPLETED = "completed"
+
+# Rows per (status, month) bucket; reads sum them. Run
+# `rebuild_portfolio_summary` after lowering it.
+SUMMARY_STRIPES = 16
+
+# (loan status, origination month, stripe)
+SummaryKey = Tuple[str, str, int]
+SummaryDeltas = Dict[SummaryKey, List[float]]
+
+
+def summary_stripe(owner_id: str) -> int:
+    """Stripe of every bucket that writes for an owner's loans go to."""
+    return zlib.crc32(owner_id.encode()) % SUMMARY_STRIPES
+
+
+def origination_month(start_date: datetime) -> str:
+    """Bucket label ("YYYY-MM", UTC) for a loan's start date."""
+    if start_date.tzinfo is not None:
+        start_date = start_date.astimezone(timezone.utc)
+    return start_date.strftime("%Y-%m")
+
+
+def completed_amount(payment: Any) -> float:
+    """Amount a payment contributes to paidAmount (only completed payments count)."""
+    return payment.amount if payment.status == COMPLETED else 0.0
+
+
+def add_loan(
+    deltas: SummaryDeltas,
+    owner_id: str,
+    loan_status: str,
+    start_date: datetime,
+    amount: float,
+    sign: int = 1,
+    paid: float = 0.0
+) -> None:
+    """
+    Accumulate adding (sign=1) or removing (sign=-1) a loan.
+
+    Args:
+        deltas: Delta map to update in place
+        owner_id: Owner of the loan
+        loan_status: Loan status
+        start_date: Loan start date
+        amount: Loan amount
+        sign: 1 to add the loan, -1 to remove it
+        paid: Completed payments moving with the loan
+    """
+    key = (loan_status, origination_month(start_date), summary_stripe(owner_id))
+    entry = deltas.setdefault(key, [0, 0.0, 0.0])
+    entry[0] += sign
+    entry[1] += sign * amount
+    entry[2] += sign * paid
+
+
+def add_paid(deltas: SummaryDeltas, owner_id: str, loan_status: str, start_date: datetime, amount: float) -> None:
+    """Accumulate a change in completed payments for a loan's bucket."""
+    key = (loan_status, origination_month(start_date), summary_stripe(owner_id))
+    entry = deltas.setdefault(key, [0, 0.0, 0.0])
+    entry[2] += amount
+
+
+async def apply_deltas(client: Prisma, deltas: SummaryDeltas) -> None:
+    """
+    Apply summary deltas with a single upsert statement.
+
+    Rows are upserted in key order, so transactions touching several
+    buckets or stripes cannot deadlock each other.
+
+    Args:
+        client: Prisma client or transaction
+        deltas: Delta map from `add_loan`/`add_paid`
+    """
+    rows = sorted(
+        (key, value) for key, value in deltas.items()
+        if value[0] or value[1] or value[2]
+    )
+    if not rows:
+        return
+
+    values = []
+    args: List[Any] = []
+    for index, ((loan_status, month, stripe), (count, amount, paid)) in enumerate(rows):
+        base = index * 6
+        values.append(
+            f"(${base + 1}, ${base + 2}, ${base + 3}::int, ${base + 4}::int, "
+            f"${base + 5}::double precision, ${base + 6}::double precision)"
+        )
+        args.extend([loan_status, month, stripe, int(count), float(amount), float(paid)])
+
+    await client.execute_raw(
+        'INSERT INTO "PortfolioSummary" '
+        '("status", "originationMonth", "stripe", "loanCount", "totalAmount", "paidAmount") '
+        f'VALUES {", ".join(values)} '
+        'ON CONFLICT ("status", "originationMonth", "stripe") DO UPDATE SET '
+        '"loanCount" = "PortfolioSummary"."loanCount" + EXCLUDED."loanCount", '
+        '"totalAmount" = "PortfolioSummary"."totalAmount" + EXCLUDED."totalAmount", '
+        '"paidAmount" = "PortfolioSummary"."paidAmount" + EXCLUDED."paidAmount"',
+        *args
+    )
+
+
+def loan_change_deltas(before: Any, after: Any) -> SummaryDeltas:
+    """
+    Deltas for updating a loan from `before` to `after`.
+
+    Completed payments move with the loan, using its maintained
+    `paidAmount`.
+
+    Args:
+        before: Loan before the update
+        after: Loan after the update
+
+    Returns:
+        Delta map (empty when nothing tracked changed)
+    """
+    deltas: SummaryDeltas = {}
+    moved = (
+        before.status != after.status
+        or origination_month(before.startDate) != origination_month(after.startDate)
+    )
+    if not moved and before.amount == after.amount:
+        return deltas
+
+    paid = before.paidAmount if moved else 0.0
+    add_loan(deltas, before.userId, before.status, before.startDate, before.amount, sign=-1, paid=paid)
+    add_loan(deltas, after.userId, after.status, after.startDate, after.amount, sign=1, paid=paid)
+    return deltas
+
+
+async def forget_user(client: Prisma, user_id: str) -> None:
+    """
+    Remove a user's loans (and their payments) from the summary.
+
+    Must run in the same transaction and before the user is deleted.
+
+    Args:
+        client: Prisma transaction
+        user_id: User about to be deleted
+    """
+    await client.execute_raw(
+        'INSERT INTO "PortfolioSummary" '
+        '("status", "originationMonth", "stripe", "loanCount", "totalAmount", "paidAmount") '
+        'SELECT "status", to_char("startDate", \'YYYY-MM\'), $2::int, -COUNT(*)::int, '
+        '-SUM("amount"), -SUM("paidAmount") '
+        'FROM "Loan" WHERE "userId" = $1 '
+        'GROUP BY 1, 2 '
+        'ORDER BY 1, 2 '
+        'ON CONFLICT ("status", "originationMonth", "stripe") DO UPDATE SET '
+        '"loanCount" = "PortfolioSummary"."loanCount" + EXCLUDED."loanCount", '
+        '"totalAmount" = "PortfolioSummary"."totalAmount" + EXCLUDED."totalAmount", '
+        '"paidAmount" = "PortfolioSummary"."paidAmount" + EXCLUDED."paidAmount"',
+        user_id,
+        summary_stripe(user_id)
+    )
+
+
+async def rebuild_portfolio_summary(client: Prisma) -> int:
+    """
+    Recompute the whole summary from the Loan and Payment tables.
+
+    Each bucket is written to stripe 0; later writes spread over the others.
+
+    Args:
+        client: Prisma client (a transaction is opened internally)
+
+    Returns:
+        Number of summary rows written
+    """
+    async with client.tx() as transaction:
+        await transaction.execute_raw('DELETE FROM "PortfolioSummary"')
+        return await transaction.execute_raw(
+            'INSERT INTO "PortfolioSummary" '
+            '("status", "originationMonth", "loanCount", "totalAmount", "paidAmount") '
+            'SELECT l."status", to_char(l."startDate", \'YYYY-MM\'), COUNT(*)::int, '
+            'SUM(l."amount"), COALESCE(SUM(p."paid"), 0) '
+            'FROM "Loan" l LEFT JOIN ('
+            '  SELECT "loanId", SUM("amount") AS "paid" FROM "Payment" '
+            '  WHERE "status" = $1 GROUP BY "loanId"'
+            ') p ON p."loanId" = l."id" '
+            'GROUP BY 1, 2',
+            COMPLETED
+        )
@@ -0,0 +1,342 @@
+"""
+Incrementally maintained list totals.
+
+Every create/update/delete of a user, loan or payment applies signed deltas
+to the `RecordCounter` table in the same transaction as the write, so list
+endpoints can read totals with a single primary-key lookup instead of
+running COUNT(*). `reconcile_counters` rebuilds the table from scratch to
+repair any drift (e.g. after data was loaded outside the API).
+
+Global ("all rows") totals are striped over GLOBAL_STRIPES rows, picked by
+the owner of the written rows, and summed on read. A write transaction
+therefore only locks its owner's rows and one stripe, instead of every
+loan and payment write in the book queueing behind the same global row.
+"""
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from prisma import Prisma
+
+LOAN = "loan"
+PAYMENT = "payment"
+USER = "user"
+
+# Wildcard scope/status: "all rows"
+ANY = ""
+
+# Stripes of each global total; reads sum them. Run `reconcile_counters`
+# after lowering it so no total is left in a dropped stripe.
+GLOBAL_STRIPES = 16
+_GLOBAL_SCOPES = [f"all:{stripe}" for stripe in range(GLOBAL_STRIPES)]
+
+CounterKey = Tuple[str, str, str]
+Deltas = Dict[CounterKey, int]
+
+
+def global_scope(owner_id: str) -> str:
+    """Stripe of the global totals that writes for an owner's rows go to."""
+    return _GLOBAL_SCOPES[zlib.crc32(owner_id.encode()) % GLOBAL_STRIPES]
+
+
+def user_scope(user_id: str) -> str:
+    """Counter scope for rows owned by a user."""
+    return f"user:{user_id}"
+
+
+def loan_scope(loan_id: str) -> str:
+    """Counter scope for payments of a single loan."""
+    return f"loan:{loan_id}"
+
+
+def merge(*deltas: Deltas) -> Deltas:
+    """Sum several delta maps into one."""
+    merged: Deltas = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def loan_deltas(user_id: str, status: str, delta: int) -> Deltas:
+    """
+    Counter changes for adding (delta > 0) or removing loans.
+
+    Args:
+        user_id: Owner of the loans
+        status: Loan status
+        delta: Number of loans added (negative when removed)
+
+    Returns:
+        Delta map covering the global and per-owner totals
+    """
+    return {
+        (LOAN, scope, key_status): delta
+        for scope in (global_scope(user_id), user_scope(user_id))
+        for key_status in (ANY, status)
+    }
+
+
+def payment_deltas(loan_id: str, owner_id: str, status: str, delta: int) -> Deltas:
+    """
+    Counter changes for adding (delta > 0) or removing payments.
+
+    Args:
+        loan_id: Loan the payments belong to
+        owner_id: Owner of that loan
+        status: Payment status
+        delta: Number of payments added (negative when removed)
+
+    Returns:
+        Delta map covering the global, per-owner and per-loan totals
+    """
+    return {
+        (PAYMENT, scope, key_status): delta
+        for scope in (global_scope(owner_id), user_scope(owner_id), loan_scope(loan_id))
+        for key_status in (ANY, status)
+    }
+
+
+def user_deltas(user_id: str, delta: int) -> Deltas:
+    """Counter changes for registering (delta > 0) or deleting a user."""
+    return {(USER, global_scope(user_id), ANY): delta}
+
+
+def status_change_deltas(
+    entity_deltas, old_status: str, new_status: str, *scope_args: str
+) -> Deltas:
+    """
+    Counter changes for moving one row from `old_status` to `new_status`.
+
+    Args:
+        entity_deltas: `loan_deltas` or `payment_deltas`
+        old_status: Status before the update
+        new_status: Status after the update
+        scope_args: Leading arguments for `entity_deltas` (IDs)
+
+    Returns:
+        Delta map (empty when the status did not change)
+    """
+    if old_status == new_status:
+        return {}
+    return merge(
+        entity_deltas(*scope_args, old_status, -1),
+        entity_deltas(*scope_args, new_status, 1)
+    )
+
+
+async def apply_deltas(client: Prisma, deltas: Deltas) -> None:
+    """
+    Apply counter deltas with a single upsert statement.
+
+    Rows are written in key order so concurrent transactions lock counter
+    rows in the same order and cannot deadlock each other. The locks are
+    held until commit, which is why global totals are striped.
+
+    Args:
+        client: Prisma client or transaction
+        deltas: Delta map to apply
+    """
+    rows = sorted((key, value) for key, value in deltas.items() if value)
+    if not rows:
+        return
+
+    values = []
+    args = []
+    for index, ((entity, scope, status), delta) in enumerate(rows):
+        base = index * 4
+        values.append(f"(${base + 1}, ${base + 2}, ${base + 3}, ${base + 4})")
+        args.extend([entity, scope, status, delta])
+
+    await client.execute_raw(
+        'INSERT INTO "RecordCounter" ("entity", "scope", "status", "total") '
+        f'VALUES {", ".join(values)} '
+        'ON CONFLICT ("entity", "scope", "status") '
+        'DO UPDATE SET "total" = "RecordCounter"."total" + EXCLUDED."total"',
+        *args
+    )
+
+
+async def read_total(client: Prisma, entity: str, scope: str = ANY, status: str = ANY) -> int:
+    """
+    Read a maintained total.
+
+    Args:
+        client: Prisma client or transaction
+        entity: LOAN, PAYMENT or USER
+        scope: Counter scope (ANY for all rows, summed over the stripes)
+        status: Status filter (ANY for all statuses)
+
+    Returns:
+        Current total (0 if the counter has never been written)
+    """
+    if scope == ANY:
+        stripes = await client.recordcounter.find_many(
+            where={"entity": entity, "scope": {"in": _GLOBAL_SCOPES}, "status": status}
+        )
+        return max(sum(stripe.total for stripe in stripes), 0)
+
+    counter = await client.recordcounter.find_unique(
+        where={
+            "entity_scope_status": {
+                "entity": entity,
+                "scope": scope,
+                "status": status
+            }
+        }
+    )
+    return max(counter.total, 0) if counter else 0
+
+
+async def count_loans(
+    client: Prisma, user_id: Optional[str] = None, status: Optional[str] = None
+) -> int:
+    """Total loans, optionally restricted to an owner and/or status."""
+    scope = user_scope(user_id) if user_id else ANY
+    return await read_total(client, LOAN, scope, status or ANY)
+
+
+async def count_payments(
+    client: Prisma,
+    loan_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    status: Optional[str] = None
+) -> int:
+    """Total payments for a loan or an owner (loan takes precedence), optionally by status."""
+    if loan_id:
+        scope = loan_scope(loan_id)
+    elif owner_id:
+        scope = user_scope(owner_id)
+    else:
+        scope = ANY
+    return await read_total(client, PAYMENT, scope, status or ANY)
+
+
+async def count_users(client: Prisma) -> int:
+    """Total registered users."""
+    return await read_total(client, USER)
+
+
+async def _grouped_counts(client: Prisma, query: str, *args: Any) -> Dict[str, int]:
+    rows = await client.query_raw(query, *args)
+    return {row["status"]: row["total"] for row in rows}
+
+
+async def loan_payment_counts(client: Prisma, loan_id: str) -> Dict[str, int]:
+    """
+    Count a loan's payments by status.
+
+    Call before deleting the loan, since its payments cascade with it.
+
+    Args:
+        client: Prisma transaction
+        loan_id: Loan ID
+
+    Returns:
+        Mapping of payment status to count
+    """
+    return await _grouped_counts(
+        client,
+        'SELECT "status", COUNT(*)::int AS "total" FROM "Payment" '
+        'WHERE "loanId" = $1 GROUP BY "status"',
+        loan_id
+    )
+
+
+async def forget_loan(client: Prisma, loan: Any, payment_counts: Dict[str, int]) -> None:
+    """
+    Account for a deleted loan, including its cascaded payments.
+
+    Must run in the same transaction as the delete.
+
+    Args:
+        client: Prisma transaction
+        loan: Deleted loan
+        payment_counts: Its payments by status, from `loan_payment_counts`
+    """
+    deltas = loan_deltas(loan.userId, loan.status, -1)
+    for status, total in payment_counts.items():
+        deltas = merge(deltas, payment_deltas(loan.id, loan.userId, status, -total))
+
+    # Per-loan counters go away with the loan
+    scope = loan_scope(loan.id)
+    deltas = {key: value for key, value in deltas.items() if key[1] != scope}
+
+    await apply_deltas(client, deltas)
+    await client.execute_raw('DELETE FROM "RecordCounter" WHERE "scope" = $1', scope)
+
+
+async def forget_user(client: Prisma, user_id: str) -> None:
+    """
+    Account for deleting a user, including cascaded loans and payments.
+
+    Must run in the same transaction and before the user is deleted.
+
+    Args:
+        client: Prisma transaction
+        user_id: User about to be deleted
+    """
+    loan_counts = await _grouped_counts(
+        client,
+        'SELECT "status", COUNT(*)::int AS "total" FROM "Loan" '
+        'WHERE "userId" = $1 GROUP BY "status"',
+        user_id
+    )
+    payment_counts = await _grouped_counts(
+        client,
+        'SELECT p."status", COUNT(*)::int AS "total" FROM "Payment" p '
+        'JOIN "Loan" l ON l."id" = p."loanId" '
+        'WHERE l."userId" = $1 GROUP BY p."status"',
+        user_id
+    )
+
+    stripe = global_scope(user_id)
+    deltas = user_deltas(user_id, -1)
+    for status, total in loan_counts.items():
+        deltas = merge(deltas, {(LOAN, stripe, ANY): -total, (LOAN, stripe, status): -total})
+    for status, total in payment_counts.items():
+        deltas = merge(deltas, {(PAYMENT, stripe, ANY): -total, (PAYMENT, stripe, status): -total})
+
+    await apply_deltas(client, deltas)
+    await client.execute_raw(
+        'DELETE FROM "RecordCounter" WHERE "scope" = $1 '
+        'OR "scope" IN (SELECT \'loan:\' || "id" FROM "Loan" WHERE "userId" = $2)',
+        user_scope(user_id),
+        user_id
+    )
+
+
+async def reconcile_counters(client: Prisma) -> int:
+    """
+    Rebuild every counter from the source tables.
+
+    Global totals are written to the first stripe.
+
+    Args:
+        client: Prisma client (a transaction is opened internally)
+
+    Returns:
+        Number of counter rows written
+    """
+    async with client.tx() as transaction:
+        await transaction.execute_raw('DELETE FROM "RecordCounter"')
+
+        written = await transaction.execute_raw(
+            'INSERT INTO "RecordCounter" ("entity", "scope", "status", "total") '
+            "SELECT 'user', 'all:0', '', COUNT(*)::int FROM \"User\""
+        )
+        written += await transaction.execute_raw(
+            'INSERT INTO "RecordCounter" ("entity", "scope", "status", "total") '
+            "SELECT 'loan', COALESCE('user:' || \"userId\", 'all:0'), COALESCE(\"status\", ''), COUNT(*)::int "
+            'FROM "Loan" '
+            'GROUP BY GROUPING SETS ((), ("userId"), ("status"), ("userId", "status"))'
+        )
+        written += await transaction.execute_raw(
+            'INSERT INTO "RecordCounter" ("entity", "scope", "status", "total") '
+            "SELECT 'payment', "
+            "COALESCE('user:' || l.\"userId\", 'loan:' || p.\"loanId\", 'all:0'), "
+            "COALESCE(p.\"status\", ''), COUNT(*)::int "
+            'FROM "Payment" p JOIN "Loan" l ON l."id" = p."loanId" '
+            'GROUP BY GROUPING SETS ((), (l."userId"), (p."loanId"), (p."status"), '
+            '(l."userId", p."status"), (p."loanId", p."status"))'
+        )
+
+    return written
@@ -0,0 +1,154 @@
+"""
+Delinquency detection over the active loan book.
+
+Active loans are streamed in keyset chunks. For each chunk, days past due
+are computed in one vectorized pass from `startDate`, `loanTerm`,
+`monthlyPayment` and the maintained `paidAmount`. Loans more than
+`default_after_days` past due are moved to "defaulted" with one UPDATE,
+and the counters and portfolio analytics are adjusted in the same
+transaction.
+"""
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from prisma import Prisma
+from prisma.models import Loan
+from app.pagination import iter_keyset_batches
+from app.services import analytics, counters, loan_totals
+from app.services.amortization import due_dates
+
+ACTIVE = "active"
+DEFAULTED = "defaulted"
+
+# Tolerance for floating point sums of payments
+_EPSILON = 1e-6
+
+ProgressCallback = Callable[[int, int, float], None]
+
+
+def days_past_due(loans: List[Any], as_of: date) -> np.ndarray:
+    """
+    Days past due of the oldest unpaid installment, for a chunk of loans.
+
+    Completed payments are applied to installments in order, so a loan is
+    past due once the installment after the last fully covered one is due.
+
+    Args:
+        loans: Loans with startDate, loanTerm, monthlyPayment and paidAmount
+        as_of: Evaluation date
+
+    Returns:
+        Array of days past due (0 when current or fully repaid)
+    """
+    count = len(loans)
+    starts = np.array([loan.startDate.date() for loan in loans], dtype="datetime64[D]")
+    terms = np.fromiter((loan.loanTerm for loan in loans), dtype=np.int64, count=count)
+    payments = np.fromiter((loan.monthlyPayment for loan in loans), dtype=np.float64, count=count)
+    paid = np.fromiter((loan.paidAmount for loan in loans), dtype=np.float64, count=count)
+
+    covered = np.floor(paid / payments + _EPSILON).astype(np.int64)
+    covered = np.clip(covered, 0, terms)
+
+    next_due = due_dates(starts, covered + 1)
+    overdue = (np.datetime64(as_of, "D") - next_due).astype(np.int64)
+    return np.where(covered < terms, np.maximum(overdue, 0), 0)
+
+
+async def _default_chunk(client: Prisma, loans: List[Any]) -> int:
+    """
+    Move a chunk of loans to "defaulted" and adjust counters and analytics.
+
+    Loans whose status or paidAmount changed since they were read are
+    skipped, so a payment posted mid-scan is never overruled. The chunk is
+    locked in ID order first, as payment writes lock loans, so the UPDATE
+    cannot deadlock with concurrent postings.
+    """
+    values = []
+    args: List[Any] = []
+    for index, loan in enumerate(loans):
+        base = index * 2
+        values.append(f"(${base + 1}, ${base + 2}::double precision)")
+        args.extend([loan.id, loan.paidAmount])
+
+    async with client.tx() as transaction:
+        await loan_totals.lock_loans(transaction, [loan.id for loan in loans])
+        defaulted = await transaction.query_raw(
+            f'UPDATE "Loan" AS l SET "status" = \'{DEFAULTED}\', "updatedAt" = {loan_totals.UPDATED_AT_NOW} '
+            f'FROM (VALUES {", ".join(values)}) AS v("id", "paid") '
+            f'WHERE l."id" = v."id" AND l."status" = \'{ACTIVE}\' AND l."paidAmount" = v."paid" '
+            'RETURNING l.*',
+            *args,
+            model=Loan
+        )
+
+        counter_deltas: counters.Deltas = {}
+        summary_deltas: analytics.SummaryDeltas = {}
+        for loan in defaulted:
+            counter_deltas = counters.merge(
+                counter_deltas,
+                counters.status_change_deltas(counters.loan_deltas, ACTIVE, DEFAULTED, loan.userId)
+            )
+            analytics.add_loan(
+                summary_deltas, loan.userId, ACTIVE, loan.startDate, loan.amount, sign=-1, paid=loan.paidAmount
+            )
+            analytics.add_loan(summary_deltas, loan.userId, DEFAULTED, loan.startDate, loan.amount, paid=loan.paidAmount)
+
+        await counters.apply_deltas(transaction, counter_deltas)
+        await analytics.apply_deltas(transaction, summary_deltas)
+
+    return len(defaulted)
+
+
+async def detect_delinquency(
+    client: Prisma,
+    as_of: date,
+    default_after_days: int,
+    chunk_size: int,
+    dry_run: bool = False,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Scan active loans and default those past the threshold.
+
+    Each chunk costs one read and, when anything defaults, one write
+    transaction, so runtime grows linearly with the number of active loans.
+
+    Args:
+        client: Prisma client
+        as_of: Evaluation date
+        default_after_days: Days past due after which a loan is defaulted
+        chunk_size: Loans per keyset chunk
+        dry_run: Compute and report without writing
+        progress: Optional callback(scanned, defaulted, rows_per_second)
+
+    Returns:
+        Summary with scanned/delinquent/defaulted counts, elapsed seconds
+        and rows per second
+    """
+    scanned = 0
+    delinquent = 0
+    defaulted = 0
+    started = time.perf_counter()
+
+    async for loans in iter_keyset_batches(client.loan, {"status": ACTIVE}, "createdAt", chunk_size):
+        overdue = days_past_due(loans, as_of)
+        scanned += len(loans)
+        delinquent += int(np.count_nonzero(overdue))
+
+        to_default = [loan for loan, days in zip(loans, overdue.tolist()) if days > default_after_days]
+        if to_default:
+            defaulted += len(to_default) if dry_run else await _default_chunk(client, to_default)
+
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress(scanned, defaulted, scanned / elapsed if elapsed else 0.0)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "scanned": scanned,
+        "delinquent": delinquent,
+        "defaulted": defaulted,
+        "elapsedSeconds": round(elapsed, 3),
+        "rowsPerSecond": round(scanned / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    CSV: "text/csv",
+    NDJSON: "application/x-ndjson",
+}
+
+
+def _plain(value: Any) -> Any:
+    """Convert a column value into something CSV/JSON can hold."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _row_values(row: Any, columns: Sequence[str]) -> Dict[str, Any]:
+    return {column: _plain(getattr(row, column)) for column in columns}
+
+
+async def stream_rows(
+    batches: AsyncIterator[List[Any]],
+    columns: Sequence[str],
+    fmt: str
+) -> AsyncIterator[str]:
+    """
+    Encode batches of rows as CSV or NDJSON text chunks.
+
+    One chunk is produced per batch (plus the CSV header), so the amount
+    of buffered text is bounded by the batch size.
+
+    Args:
+        batches: Async iterator of row batches (e.g. `iter_keyset_batches`)
+        columns: Attribute names to export, in order
+        fmt: CSV or NDJSON
+
+    Yields:
+        Encoded text chunks
+    """
+    if fmt == CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+        async for rows in batches:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([_plain(getattr(row, column)) for column in columns])
+            yield buffer.getvalue()
+    else:
+        async for rows in batches:
+            yield "".join(json.dumps(_row_values(row, columns)) + "\n" for row in rows)
@@ -0,0 +1,177 @@
+"""
+Denormalized per-loan running totals.
+
+Each loan carries `paidAmount`, `paymentCount` and `lastPaymentDate` over
+its completed payments, plus `outstandingBalance` (amount minus paid).
+Payment writes first lock the affected loan rows, then apply deltas in the
+same transaction, so concurrent postings to one loan serialize on that
+loan's row. Postings to other loans only meet on the shared rows the same
+transaction writes: their owner's list counters and one stripe of the
+global counters (see `counters`) and of the portfolio summary bucket of the
+loan's status and origination month (see `analytics`), both picked by owner.
+`reconcile_loan_totals` recomputes every loan from the Payment table.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from prisma import Prisma
+from prisma.models import Loan
+from app.services.analytics import COMPLETED
+
+# loan ID -> [paid delta, count delta, latest added date, recompute last date]
+TotalsDeltas = Dict[str, List[Any]]
+
+# `updatedAt` as Prisma writes it: UTC in a timestamp(3) column, so raw
+# writes round-trip through millisecond ETags and If-Match versions
+UPDATED_AT_NOW = "date_trunc('milliseconds', NOW() AT TIME ZONE 'UTC')"
+
+
+async def lock_loans(client: Prisma, loan_ids: Iterable[str], owner_id: Optional[str] = None) -> List[Loan]:
+    """
+    Lock loan rows for the rest of the transaction.
+
+    Rows are locked in ID order so transactions touching several loans
+    cannot deadlock each other.
+
+    Args:
+        client: Prisma transaction
+        loan_ids: Loans about to receive writes
+        owner_id: Only lock loans owned by this user (None for any owner)
+
+    Returns:
+        The locked loans as of the lock (missing or foreign IDs are skipped)
+    """
+    ids = sorted(set(loan_ids))
+    if not ids:
+        return []
+
+    placeholders = ", ".join(f"${index + 1}" for index in range(len(ids)))
+    owner_filter = ""
+    args: List[Any] = list(ids)
+    if owner_id is not None:
+        args.append(owner_id)
+        owner_filter = f' AND "userId" = ${len(args)}'
+    return await client.query_raw(
+        f'SELECT * FROM "Loan" WHERE "id" IN ({placeholders}){owner_filter} ORDER BY "id" FOR UPDATE',
+        *args,
+        model=Loan
+    )
+
+
+async def lock_payment_loan(client: Prisma, payment_id: str, owner_id: Optional[str] = None) -> None:
+    """
+    Lock the loan a payment belongs to.
+
+    Call before reading the payment so its previous values cannot change
+    underneath the transaction.
+
+    Args:
+        client: Prisma transaction
+        payment_id: Payment about to be updated or deleted
+        owner_id: Only lock the loan if this user owns it (None for any owner)
+    """
+    if owner_id is None:
+        await client.query_raw(
+            'SELECT l."id" FROM "Loan" l JOIN "Payment" p ON p."loanId" = l."id" '
+            'WHERE p."id" = $1 FOR UPDATE OF l',
+            payment_id
+        )
+        return
+
+    await client.query_raw(
+        'SELECT l."id" FROM "Loan" l JOIN "Payment" p ON p."loanId" = l."id" '
+        'WHERE p."id" = $1 AND l."userId" = $2 FOR UPDATE OF l',
+        payment_id,
+        owner_id
+    )
+
+
+def add_payment(deltas: TotalsDeltas, payment: Any, sign: int = 1) -> None:
+    """
+    Accumulate adding (sign=1) or removing (sign=-1) a payment.
+
+    Only completed payments count towards the totals.
+
+    Args:
+        deltas: Delta map to update in place
+        payment: Payment (or PaymentCreate) with loanId, amount, date and status
+        sign: 1 to add the payment, -1 to remove it
+    """
+    if payment.status != COMPLETED:
+        return
+
+    entry = deltas.setdefault(payment.loanId, [0.0, 0, None, False])
+    entry[0] += sign * payment.amount
+    entry[1] += sign
+    if sign > 0:
+        entry[2] = payment.date if entry[2] is None else max(entry[2], payment.date)
+    else:
+        # The removed payment may have been the latest one
+        entry[3] = True
+
+
+async def apply_deltas(client: Prisma, deltas: TotalsDeltas) -> None:
+    """
+    Apply per-loan deltas with a single UPDATE ... FROM (VALUES ...).
+
+    Must run after the payment writes and in the same transaction, with
+    the loans already locked by `lock_loans`/`lock_payment_loan`.
+
+    Args:
+        client: Prisma transaction
+        deltas: Delta map from `add_payment`
+    """
+    rows = sorted(
+        (loan_id, value) for loan_id, value in deltas.items()
+        if value[0] or value[1] or value[2] is not None or value[3]
+    )
+    if not rows:
+        return
+
+    values = []
+    args: List[Any] = []
+    for index, (loan_id, (paid, count, last_date, recompute)) in enumerate(rows):
+        base = index * 5
+        values.append(
+            f"(${base + 1}, ${base + 2}::double precision, ${base + 3}::int, "
+            f"(${base + 4}::timestamptz AT TIME ZONE 'UTC'), ${base + 5}::boolean)"
+        )
+        args.extend([loan_id, float(paid), int(count), last_date, recompute])
+
+    await client.execute_raw(
+        'UPDATE "Loan" AS l SET '
+        '"paidAmount" = l."paidAmount" + v."paid", '
+        '"paymentCount" = l."paymentCount" + v."count", '
+        '"outstandingBalance" = l."outstandingBalance" - v."paid", '
+        '"lastPaymentDate" = CASE WHEN v."recompute" THEN ('
+        '  SELECT MAX(p."date") FROM "Payment" p '
+        f"  WHERE p.\"loanId\" = l.\"id\" AND p.\"status\" = '{COMPLETED}'"
+        ') ELSE GREATEST(l."lastPaymentDate", v."last") END, '
+        f'"updatedAt" = {UPDATED_AT_NOW} '
+        f'FROM (VALUES {", ".join(values)}) AS v("id", "paid", "count", "last", "recompute") '
+        'WHERE l."id" = v."id"',
+        *args
+    )
+
+
+async def reconcile_loan_totals(client: Prisma) -> int:
+    """
+    Recompute every loan's running totals from its payments.
+
+    Args:
+        client: Prisma client
+
+    Returns:
+        Number of loans updated
+    """
+    return await client.execute_raw(
+        'UPDATE "Loan" AS l SET '
+        '"paidAmount" = COALESCE(p."paid", 0), '
+        '"paymentCount" = COALESCE(p."count", 0), '
+        '"lastPaymentDate" = p."last", '
+        '"outstandingBalance" = l."amount" - COALESCE(p."paid", 0) '
+        'FROM "Loan" AS src LEFT JOIN ('
+        '  SELECT "loanId", SUM("amount") AS "paid", COUNT(*)::int AS "count", MAX("date") AS "last" '
+        '  FROM "Payment" WHERE "status" = $1 GROUP BY "loanId"'
+        ') p ON p."loanId" = src."id" '
+        'WHERE l."id" = src."id"',
+        COMPLETED
+    )
@@ -0,0 +1,103 @@
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from prisma import Prisma
+from app.pagination import iter_keyset_batches
+from app.services.amortization import monthly_payments
+from app.services.loan_totals import UPDATED_AT_NOW, lock_loans
+
+ProgressCallback = Callable[[int, int, float], None]
+
+
+def _matches(loan: Any, where: Dict[str, Any]) -> bool:
+    """Whether a loan still satisfies equality filters on its fields."""
+    return all(getattr(loan, field) == value for field, value in where.items())
+
+
+async def _reprice_chunk(client: Prisma, ids: List[str], where: Dict[str, Any], rate: float) -> int:
+    """
+    Reprice one chunk of loans in its own transaction.
+
+    The loans are locked in ID order (as payment writes and the delinquency
+    worker lock them) and re-read under the lock. Loans deleted or no
+    longer matching `where` since the chunk was read are skipped, and
+    payments are computed from the locked amount and term, so a concurrent
+    loan update can neither be overwritten with stale terms nor be repriced
+    out of the filter.
+
+    Returns:
+        Number of loans updated
+    """
+    async with client.tx() as transaction:
+        loans = [loan for loan in await lock_loans(transaction, ids) if _matches(loan, where)]
+        if not loans:
+            return 0
+
+        amounts = np.fromiter((loan.amount for loan in loans), dtype=np.float64, count=len(loans))
+        terms = np.fromiter((loan.loanTerm for loan in loans), dtype=np.float64, count=len(loans))
+        payments = np.round(monthly_payments(amounts, rate, terms), 2)
+
+        values = []
+        args: List[Any] = []
+        for index, (loan, payment) in enumerate(zip(loans, payments.tolist())):
+            base = index * 3
+            values.append(f"(${base + 1}, ${base + 2}::double precision, ${base + 3}::double precision)")
+            args.extend([loan.id, rate, payment])
+
+        return await transaction.execute_raw(
+            'UPDATE "Loan" AS l '
+            'SET "interestRate" = v."rate", "monthlyPayment" = v."payment", '
+            f'"updatedAt" = {UPDATED_AT_NOW} '
+            f'FROM (VALUES {", ".join(values)}) AS v("id", "rate", "payment") '
+            'WHERE l."id" = v."id"',
+            *args
+        )
+
+
+async def reprice_loans(
+    client: Prisma,
+    where: Dict[str, Any],
+    new_rate: float,
+    chunk_size: int,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Move matching loans to a new interest rate and recompute monthlyPayment.
+
+    Loans are read in keyset chunks. Each chunk is locked and re-read in
+    its own transaction, its payments are computed in one vectorized pass
+    and written back with one statement, so a failure only rolls back the
+    current chunk. Loans changed out of the filter (or deleted) between the
+    read and the lock are skipped.
+
+    Args:
+        client: Prisma client
+        where: Equality filters on Loan fields selecting the loans to reprice
+        new_rate: New annual interest rate in percent
+        chunk_size: Loans per read/compute/write chunk
+        progress: Optional callback(processed, matched, rows_per_second)
+
+    Returns:
+        Summary with matched/updated/skipped counts, elapsed seconds and rows per second
+    """
+    matched = await client.loan.count(where=where if where else None)
+    updated = 0
+    processed = 0
+    started = time.perf_counter()
+
+    async for loans in iter_keyset_batches(client.loan, where, "createdAt", chunk_size):
+        updated += await _reprice_chunk(client, [loan.id for loan in loans], where, new_rate)
+        processed += len(loans)
+
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress(processed, matched, processed / elapsed if elapsed else 0.0)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "matched": matched,
+        "updated": updated,
+        "skipped": processed - updated,
+        "elapsedSeconds": round(elapsed, 3),
+        "rowsPerSecond": round(updated / elapsed, 1) if elapsed else 0.0,
+    }
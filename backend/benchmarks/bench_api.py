@@ -0,0 +1,504 @@
+"""
+End-to-end API benchmark with latency regression gates.
+
+Seeds a synthetic book (users, loans, payments), then drives every endpoint
+group (auth, users, loans, payments, analytics) through the ASGI app with
+httpx at a fixed concurrency. Records p50/p95/p99 latency and throughput
+per scenario to JSON and, given a baseline file from an earlier run, fails
+when any scenario is slower than the baseline by more than the tolerance.
+Seeded rows are removed afterwards and the maintained totals rebuilt.
+
+Usage (against a disposable local database with migrations applied):
+
+    pip install -r benchmarks/requirements.txt
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python benchmarks/bench_api.py \\
+        --output results.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import httpx
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth.jwt_handler import create_access_token, create_refresh_token
+from app.auth.password import hash_password
+from app.database import count_queries, db
+from app.main import app
+from app.services.analytics import rebuild_portfolio_summary
+from app.services.counters import reconcile_counters
+from app.services.loan_totals import reconcile_loan_totals
+
+PASSWORD = "bench-password"
+SEED_CHUNK = 1000
+BULK_ITEMS = 100
+INGEST_LINES = 100
+
+
+class Account(NamedTuple):
+    """A seeded user with ready-made tokens and the IDs it owns."""
+    id: str
+    email: str
+    access_token: str
+    refresh_token: str
+    loan_ids: List[str]
+    payment_ids: List[str]
+
+
+class Scenario(NamedTuple):
+    """
+    One benchmarked request shape.
+
+    `build` returns (method, path, body, account); the body is sent as JSON,
+    or as an NDJSON stream when it is bytes.
+    """
+    name: str
+    build: Callable[["Context"], tuple]
+
+
+class Context:
+    """Seeded data shared by all scenarios."""
+
+    def __init__(self, prefix: str, admin: Account, accounts: List[Account], seed: int):
+        self.prefix = prefix
+        self.admin = admin
+        self.accounts = accounts
+        self.random = random.Random(seed)
+
+    def account(self) -> Account:
+        return self.random.choice(self.accounts)
+
+    def loan(self):
+        account = self.account()
+        return account, self.random.choice(account.loan_ids)
+
+    def payment(self):
+        account = self.account()
+        return account, self.random.choice(account.payment_ids)
+
+    def take(self, kind: str):
+        """Remove and return a seeded loan or payment ID (for scenarios that delete it)."""
+        accounts = [account for account in self.accounts if getattr(account, kind)]
+        if not accounts:
+            raise RuntimeError(f"No seeded {kind[:-4]}s left to delete; seed a larger book")
+        account = self.random.choice(accounts)
+        ids = getattr(account, kind)
+        return account, ids.pop(self.random.randrange(len(ids)))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _login(ctx: Context):
+    return "POST", "/auth/login", {"email": ctx.account().email, "password": PASSWORD}, None
+
+
+def _register(ctx: Context):
+    email = f"{ctx.prefix}reg-{uuid.uuid4().hex[:12]}@example.com"
+    return "POST", "/auth/register", {"name": "Bench", "email": email, "password": PASSWORD}, None
+
+
+def _refresh(ctx: Context):
+    return "POST", "/auth/refresh", {"refresh_token": ctx.account().refresh_token}, None
+
+
+def _me(ctx: Context):
+    return "GET", "/auth/me", None, ctx.account()
+
+
+def _list_users(ctx: Context):
+    return "GET", "/users?limit=50", None, ctx.admin
+
+
+def _get_user(ctx: Context):
+    account = ctx.account()
+    return "GET", f"/users/{account.id}", None, account
+
+
+def _update_user(ctx: Context):
+    account = ctx.account()
+    return "PUT", f"/users/{account.id}", {"phone": str(ctx.random.randint(1000000, 9999999))}, account
+
+
+def _list_loans(ctx: Context):
+    return "GET", "/loans?limit=50", None, ctx.account()
+
+
+def _list_loans_by_status(ctx: Context):
+    return "GET", "/loans?limit=50&status=active", None, ctx.admin
+
+
+def _get_loan(ctx: Context):
+    account, loan_id = ctx.loan()
+    return "GET", f"/loans/{loan_id}", None, account
+
+
+def _list_loans_included(ctx: Context):
+    return "GET", "/loans?limit=50&include=payments,user&payments_limit=5", None, ctx.admin
+
+
+def _get_loan_included(ctx: Context):
+    account, loan_id = ctx.loan()
+    return "GET", f"/loans/{loan_id}?include=payments,user", None, account
+
+
+def _loan_schedule(ctx: Context):
+    account, loan_id = ctx.loan()
+    return "GET", f"/loans/{loan_id}/schedule", None, account
+
+
+def _create_loan(ctx: Context):
+    account = ctx.account()
+    body = {
+        "borrowerName": "Bench",
+        "amount": 10000.0,
+        "interestRate": 6.5,
+        "loanTerm": 36,
+        "startDate": _now(),
+        "monthlyPayment": 306.49,
+        "userId": account.id,
+    }
+    return "POST", "/loans", body, account
+
+
+def _create_loans_bulk(ctx: Context):
+    account = ctx.account()
+    body = [{
+        "borrowerName": "Bench",
+        "amount": 10000.0,
+        "interestRate": 6.5,
+        "loanTerm": 36,
+        "startDate": _now(),
+        "monthlyPayment": 306.49,
+        "userId": account.id,
+    }] * BULK_ITEMS
+    return "POST", "/loans/bulk", body, account
+
+
+def _export_loans(ctx: Context):
+    return "GET", "/loans/export?format=ndjson", None, ctx.account()
+
+
+def _reprice_loans(ctx: Context):
+    body = {"interestRate": round(ctx.random.uniform(4, 9), 2), "userId": ctx.account().id}
+    return "POST", "/loans/reprice", body, ctx.admin
+
+
+def _delete_loan(ctx: Context):
+    account, loan_id = ctx.take("loan_ids")
+    return "DELETE", f"/loans/{loan_id}", None, account
+
+
+def _update_loan(ctx: Context):
+    account, loan_id = ctx.loan()
+    return "PUT", f"/loans/{loan_id}", {"borrowerName": f"Bench {ctx.random.randint(0, 999)}"}, account
+
+
+def _list_payments(ctx: Context):
+    return "GET", "/payments?limit=50", None, ctx.account()
+
+
+def _payments_by_loan(ctx: Context):
+    account, loan_id = ctx.loan()
+    return "GET", f"/payments/loan/{loan_id}", None, account
+
+
+def _get_payment(ctx: Context):
+    account, payment_id = ctx.payment()
+    return "GET", f"/payments/{payment_id}", None, account
+
+
+def _create_payment(ctx: Context):
+    account, loan_id = ctx.loan()
+    body = {"loanId": loan_id, "amount": 306.49, "date": _now(), "status": "completed"}
+    return "POST", "/payments", body, account
+
+
+def _update_payment(ctx: Context):
+    account, payment_id = ctx.payment()
+    return "PUT", f"/payments/{payment_id}", {"amount": round(ctx.random.uniform(100, 400), 2)}, account
+
+
+def _ingest_payments(ctx: Context):
+    account = ctx.account()
+    now = _now()
+    body = b"".join(
+        json.dumps({
+            "loanId": ctx.random.choice(account.loan_ids), "amount": 306.49, "date": now, "status": "completed",
+        }).encode() + b"\n"
+        for _ in range(INGEST_LINES)
+    )
+    return "POST", "/payments/ingest", body, account
+
+
+def _export_payments(ctx: Context):
+    return "GET", "/payments/export?format=csv", None, ctx.account()
+
+
+def _delete_payment(ctx: Context):
+    account, payment_id = ctx.take("payment_ids")
+    return "DELETE", f"/payments/{payment_id}", None, account
+
+
+def _portfolio(ctx: Context):
+    return "GET", "/analytics/portfolio", None, ctx.admin
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("auth.login", _login),
+    Scenario("auth.register", _register),
+    Scenario("auth.refresh", _refresh),
+    Scenario("auth.me", _me),
+    Scenario("users.list", _list_users),
+    Scenario("users.get", _get_user),
+    Scenario("users.update", _update_user),
+    Scenario("loans.list", _list_loans),
+    Scenario("loans.list_admin_status", _list_loans_by_status),
+    Scenario("loans.list_included", _list_loans_included),
+    Scenario("loans.get", _get_loan),
+    Scenario("loans.get_included", _get_loan_included),
+    Scenario("loans.schedule", _loan_schedule),
+    Scenario("loans.create", _create_loan),
+    Scenario("loans.create_bulk", _create_loans_bulk),
+    Scenario("loans.update", _update_loan),
+    Scenario("loans.export", _export_loans),
+    Scenario("loans.reprice", _reprice_loans),
+    Scenario("payments.list", _list_payments),
+    Scenario("payments.by_loan", _payments_by_loan),
+    Scenario("payments.get", _get_payment),
+    Scenario("payments.create", _create_payment),
+    Scenario("payments.ingest", _ingest_payments),
+    Scenario("payments.update", _update_payment),
+    Scenario("payments.export", _export_payments),
+    Scenario("analytics.portfolio", _portfolio),
+    # Deletes consume seeded rows, so they run last (payments before their loans)
+    Scenario("payments.delete", _delete_payment),
+    Scenario("loans.delete", _delete_loan),
+]
+
+
+async def seed(prefix: str, users: int, loans_per_user: int, payments_per_loan: int) -> Context:
+    """Insert the synthetic book directly and rebuild the maintained totals."""
+    password = hash_password(PASSWORD)
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=30 * payments_per_loan)
+
+    admin_id = str(uuid.uuid4())
+    user_rows = [{
+        "id": admin_id, "name": "Bench admin", "email": f"{prefix}admin@example.com",
+        "password": password, "role": "admin",
+    }]
+    owned: Dict[str, Dict[str, List[str]]] = {}
+    for index in range(users):
+        user_id = str(uuid.uuid4())
+        user_rows.append({
+            "id": user_id, "name": f"Bench {index}", "email": f"{prefix}{index}@example.com",
+            "password": password, "role": "user",
+        })
+        owned[user_id] = {"loans": [], "payments": []}
+    await db.user.create_many(data=user_rows)
+
+    loan_rows = []
+    payment_rows = []
+    for user_id, ids in owned.items():
+        for _ in range(loans_per_user):
+            loan_id = str(uuid.uuid4())
+            ids["loans"].append(loan_id)
+            loan_rows.append({
+                "id": loan_id, "borrowerName": "Bench", "amount": 10000.0, "interestRate": 6.5,
+                "loanTerm": 36, "startDate": start, "status": "active", "monthlyPayment": 306.49,
+                "outstandingBalance": 10000.0, "userId": user_id,
+            })
+            for number in range(payments_per_loan):
+                payment_id = str(uuid.uuid4())
+                ids["payments"].append(payment_id)
+                payment_rows.append({
+                    "id": payment_id, "loanId": loan_id, "amount": 306.49,
+                    "date": start + timedelta(days=30 * (number + 1)), "status": "completed",
+                })
+
+    for offset in range(0, len(loan_rows), SEED_CHUNK):
+        await db.loan.create_many(data=loan_rows[offset:offset + SEED_CHUNK])
+    for offset in range(0, len(payment_rows), SEED_CHUNK):
+        await db.payment.create_many(data=payment_rows[offset:offset + SEED_CHUNK])
+
+    await rebuild_totals()
+
+    def account(row: Dict[str, Any], ids: Dict[str, List[str]]) -> Account:
+        claims = {"sub": row["id"], "email": row["email"], "role": row["role"]}
+        return Account(
+            row["id"], row["email"], create_access_token(claims),
+            create_refresh_token({"sub": row["id"]}), ids["loans"], ids["payments"],
+        )
+
+    admin = account(user_rows[0], {"loans": [], "payments": []})
+    accounts = [account(row, owned[row["id"]]) for row in user_rows[1:]]
+    return Context(prefix, admin, accounts, seed=len(user_rows))
+
+
+async def rebuild_totals():
+    await reconcile_loan_totals(db)
+    await reconcile_counters(db)
+    await rebuild_portfolio_summary(db)
+
+
+async def cleanup(prefix: str):
+    """Delete every user the run created (loans and payments cascade)."""
+    await db.user.delete_many(where={"email": {"startswith": prefix}})
+    await rebuild_totals()
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, ctx: Context, scenario: Scenario, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """Issue `requests` calls with `concurrency` workers and summarize latencies."""
+    latencies: List[float] = []
+    query_counts: List[int] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, path, body, account = scenario.build(ctx)
+            headers = {"Authorization": f"Bearer {account.access_token}"} if account else {}
+            if isinstance(body, bytes):
+                headers["Content-Type"] = "application/x-ndjson"
+                payload = {"content": body}
+            else:
+                payload = {"json": body}
+            with count_queries() as stats:
+                started = time.perf_counter()
+                response = await client.request(method, path, headers=headers, **payload)
+                latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(stats.count)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "max_queries": max(query_counts),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return one message per scenario slower than the baseline beyond `tolerance`."""
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {current[metric]}")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput_rps {base['throughput_rps']} -> {current['throughput_rps']}"
+            )
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+        # Query counts are deterministic, so any increase is a regression
+        if "max_queries" in base and current["max_queries"] > base["max_queries"]:
+            regressions.append(f"{name}: max_queries {base['max_queries']} -> {current['max_queries']}")
+    return regressions
+
+
+async def main(args) -> int:
+    prefix = f"bench-api-{uuid.uuid4().hex[:8]}-"
+    scenarios = [s for s in SCENARIOS if not args.only or s.name.startswith(tuple(args.only))]
+
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f"❌ Baseline {args.baseline} not found; create it on main with --output {args.baseline}")
+        return 1
+
+    # ASGITransport does not send lifespan events, so run startup/shutdown here
+    async with app.router.lifespan_context(app):
+        print(f"🌱 Seeding {args.users} users x {args.loans_per_user} loans x {args.payments_per_loan} payments...")
+        ctx = await seed(prefix, args.users, args.loans_per_user, args.payments_per_loan)
+
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                results: Dict[str, Any] = {
+                    "meta": {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "python": platform.python_version(),
+                        "users": args.users,
+                        "loans_per_user": args.loans_per_user,
+                        "payments_per_loan": args.payments_per_loan,
+                        "requests": args.requests,
+                        "concurrency": args.concurrency,
+                    },
+                    "scenarios": {},
+                }
+                print(
+                    f"{'scenario':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                    f"{'req/s':>8} {'errors':>7} {'queries':>8}"
+                )
+                for scenario in scenarios:
+                    # Warm caches and connections before measuring
+                    await run_scenario(client, ctx, scenario, args.concurrency, args.concurrency)
+                    summary = await run_scenario(client, ctx, scenario, args.requests, args.concurrency)
+                    results["scenarios"][scenario.name] = summary
+                    print(
+                        f"{scenario.name:<26} {summary['p50_ms']:>8.2f} {summary['p95_ms']:>8.2f} "
+                        f"{summary['p99_ms']:>8.2f} {summary['throughput_rps']:>8.0f} {summary['errors']:>7} "
+                        f"{summary['max_queries']:>8}"
+                    )
+        finally:
+            await cleanup(prefix)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        ungated = sorted(set(results["scenarios"]).difference(baseline["scenarios"]))
+        if ungated:
+            print(f"⚠️  Not in the baseline (not gated): {', '.join(ungated)}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for message in regressions:
+                print(f"   {message}")
+            return 1
+        print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--loans-per-user", type=int, default=10)
+    parser.add_argument("--payments-per-loan", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--only", nargs="+", help="run scenarios whose name starts with any of these")
+    parser.add_argument("--output", help="write results JSON here (use as a future --baseline)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,82 @@
+"""
+Compare rows/second of POST /loans (one call per loan) and POST /loans/bulk.
+
+Calls the route handlers directly against the database in DATABASE_URL, so
+the numbers exclude HTTP overhead (which only widens the gap in practice).
+All rows created by the benchmark are removed afterwards.
+
+Usage:
+
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python benchmarks/bench_bulk_loans.py --rows 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import db, connect_db, disconnect_db
+from app.models.schemas import LoanCreate
+from app.routes.loans import create_loan, create_loans_bulk
+from app.services.analytics import rebuild_portfolio_summary
+from app.services.counters import reconcile_counters
+
+
+def make_loans(user_id: str, count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        LoanCreate(
+            borrowerName=f"Bench {i}",
+            amount=10000.0,
+            interestRate=6.5,
+            loanTerm=36,
+            startDate=now,
+            monthlyPayment=306.49,
+            userId=user_id,
+        )
+        for i in range(count)
+    ]
+
+
+async def main(rows: int, single_rows: int):
+    await connect_db()
+    user = await db.user.create(
+        data={
+            "name": "bench-bulk",
+            "email": f"bench-bulk-{uuid.uuid4().hex[:8]}@example.com",
+            "password": "x",
+            "role": "admin",
+        }
+    )
+
+    try:
+        started = time.perf_counter()
+        for loan_data in make_loans(user.id, single_rows):
+            await create_loan(loan_data, current_user=user)
+        single_rate = single_rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        response = await create_loans_bulk(make_loans(user.id, rows), current_user=user)
+        bulk_rate = response.created / (time.perf_counter() - started)
+
+        print(f"single-row POST /loans : {single_rate:>10,.0f} rows/s ({single_rows} rows)")
+        print(f"POST /loans/bulk       : {bulk_rate:>10,.0f} rows/s ({response.created} rows)")
+        print(f"speedup                : {bulk_rate / single_rate:>10.1f}x")
+    finally:
+        # Loans cascade; rebuild counters and analytics the benchmark touched
+        await db.user.delete(where={"id": user.id})
+        await reconcile_counters(db)
+        await rebuild_portfolio_summary(db)
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000, help="rows for the bulk endpoint")
+    parser.add_argument("--single-rows", type=int, default=500, help="rows for the single-row path")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.single_rows))
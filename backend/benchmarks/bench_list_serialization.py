@@ -0,0 +1,146 @@
+"""
+CPU time per item of list response serialization (no database).
+
+Serves the same page of Prisma rows through two routes declared with the
+same `response_model`: one returns a `*ListResponse` model as the list
+handlers used to (validated again by FastAPI and encoded by the standard
+encoder), the other uses `app.responses.list_response` (rows dumped
+directly with orjson). Reports CPU microseconds per item for each page
+size and checks that both bodies are identical. A third route serves the
+loans with the sparse fieldset of the mobile loan list (`--fields`) to
+show the payload and CPU saved by `fields=`.
+
+Usage:
+
+    pip install -r benchmarks/requirements.txt
+    DATABASE_URL=postgresql://unused JWT_SECRET_KEY=x python benchmarks/bench_list_serialization.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI, Request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prisma.models import Loan, Payment, User
+from app.models.schemas import (
+    LoanListResponse,
+    LoanResponse,
+    PaymentListResponse,
+    PaymentResponse,
+    UserListResponse,
+    UserResponse
+)
+from app.fieldsets import loan_fields
+from app.responses import list_response
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _loan(index: int) -> Loan:
+    return Loan(
+        id=str(uuid.uuid4()), borrowerName=f"Borrower {index}", amount=10000.0 + index, interestRate=6.5,
+        loanTerm=36, startDate=NOW - timedelta(days=index), status="active", monthlyPayment=306.49,
+        userId=str(uuid.uuid4()), paidAmount=612.98, paymentCount=2, lastPaymentDate=NOW,
+        outstandingBalance=9387.02 + index, createdAt=NOW, updatedAt=NOW,
+    )
+
+
+def _payment(index: int) -> Payment:
+    return Payment(
+        id=str(uuid.uuid4()), loanId=str(uuid.uuid4()), amount=306.49, date=NOW - timedelta(hours=index),
+        status="completed", createdAt=NOW, updatedAt=NOW,
+    )
+
+
+def _user(index: int) -> User:
+    return User(
+        id=str(uuid.uuid4()), name=f"User {index}", email=f"user{index}@example.com", phone=None,
+        password="$2b$12$" + "x" * 53, role="user", createdAt=NOW, updatedAt=NOW,
+    )
+
+
+# name -> (row factory, list model, item model, list key)
+RESOURCES: Dict[str, tuple] = {
+    "loans": (_loan, LoanListResponse, LoanResponse, "loans"),
+    "payments": (_payment, PaymentListResponse, PaymentResponse, "payments"),
+    "users": (_user, UserListResponse, UserResponse, "users"),
+}
+
+
+def build_app(rows: Dict[str, List[Any]], fields: str) -> FastAPI:
+    """One standard and one fast-path route per resource, serving fixed rows."""
+    app = FastAPI()
+    fieldset = loan_fields.select(fields)
+
+    @app.get("/sparse/loans", response_model=LoanListResponse)
+    async def sparse(request: Request):
+        return list_response(request, "loans", rows["loans"], fieldset.response_model, len(rows["loans"]), "cursor")
+
+    def add_routes(name: str, list_model: Any, item_model: Any, key: str):
+        @app.get(f"/standard/{name}", response_model=list_model)
+        async def standard():
+            return list_model(**{key: rows[name]}, total=len(rows[name]), next_cursor="cursor")
+
+        @app.get(f"/fast/{name}", response_model=list_model)
+        async def fast(request: Request):
+            return list_response(request, key, rows[name], item_model, len(rows[name]), "cursor")
+
+    for name, (_, list_model, item_model, key) in RESOURCES.items():
+        add_routes(name, list_model, item_model, key)
+    return app
+
+
+async def cpu_per_item(client: httpx.AsyncClient, path: str, requests: int, items: int) -> float:
+    """CPU microseconds per item over `requests` sequential calls."""
+    await client.get(path)
+    started = time.process_time()
+    for _ in range(requests):
+        await client.get(path)
+    return (time.process_time() - started) / (requests * items) * 1e6
+
+
+async def main(args) -> int:
+    mismatches = 0
+    print(f"{'resource':<10} {'items':>6} {'standard us':>12} {'fast us':>9} {'speedup':>8}")
+    for size in args.sizes:
+        rows = {name: [factory(i) for i in range(size)] for name, (factory, *_rest) in RESOURCES.items()}
+        transport = httpx.ASGITransport(app=build_app(rows, args.fields))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in RESOURCES:
+                standard = await client.get(f"/standard/{name}")
+                fast = await client.get(f"/fast/{name}")
+                if json.loads(standard.content) != json.loads(fast.content):
+                    mismatches += 1
+                    print(f"❌ {name}: fast-path body differs from the response model's")
+
+                requests = max(1, args.items // size)
+                slow_us = await cpu_per_item(client, f"/standard/{name}", requests, size)
+                fast_us = await cpu_per_item(client, f"/fast/{name}", requests, size)
+                print(f"{name:<10} {size:>6} {slow_us:>12.2f} {fast_us:>9.2f} {slow_us / fast_us:>7.1f}x")
+
+            full = await client.get("/fast/loans")
+            sparse = await client.get("/sparse/loans")
+            sparse_us = await cpu_per_item(client, "/sparse/loans", max(1, args.items // size), size)
+            print(
+                f"{'  fields=':<10} {size:>6} {'':>12} {sparse_us:>9.2f} "
+                f"   bytes {len(full.content)} -> {len(sparse.content)}"
+            )
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="items per page")
+    parser.add_argument("--items", type=int, default=100000, help="items serialized per measurement")
+    parser.add_argument("--fields", default="borrowerName,amount,status,monthlyPayment", help="sparse loan fieldset")
+    sys.exit(asyncio.run(main(parser.parse_args())))
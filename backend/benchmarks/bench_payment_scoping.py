@@ -0,0 +1,117 @@
+"""
+Benchmark ownership-scoped payment listing for non-admin users.
+
+Compares the old two-step approach (load the user's loan IDs, then filter
+payments with `loanId IN (...)`) against the single relational query used
+by `GET /payments`, for users owning 1, 100 and 10,000 loans.
+
+Usage (against a disposable local database):
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_payment_scoping.py
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from prisma import Prisma
+
+PAGE_SIZE = 100
+
+
+async def seed_user(db: Prisma, loan_count: int) -> str:
+    """Create a user owning `loan_count` loans with one payment each."""
+    user = await db.user.create(
+        data={
+            "name": f"bench-{loan_count}",
+            "email": f"bench-{loan_count}-{uuid.uuid4().hex[:8]}@example.com",
+            "password": "x",
+        }
+    )
+    now = datetime.now(timezone.utc)
+    loan_ids = [str(uuid.uuid4()) for _ in range(loan_count)]
+
+    for start in range(0, loan_count, 1000):
+        chunk = loan_ids[start:start + 1000]
+        await db.loan.create_many(
+            data=[
+                {
+                    "id": loan_id,
+                    "borrowerName": "Bench",
+                    "amount": 1000.0,
+                    "interestRate": 5.0,
+                    "loanTerm": 12,
+                    "startDate": now,
+                    "status": "active",
+                    "monthlyPayment": 85.61,
+                    "userId": user.id,
+                }
+                for loan_id in chunk
+            ]
+        )
+        await db.payment.create_many(
+            data=[
+                {"loanId": loan_id, "amount": 85.61, "date": now, "status": "completed"}
+                for loan_id in chunk
+            ]
+        )
+
+    return user.id
+
+
+async def two_step(db: Prisma, user_id: str):
+    loans = await db.loan.find_many(where={"userId": user_id})
+    loan_ids = [loan.id for loan in loans]
+    return await db.payment.find_many(
+        where={"loanId": {"in": loan_ids}},
+        take=PAGE_SIZE,
+        order=[{"date": "desc"}, {"id": "desc"}],
+    )
+
+
+async def relational(db: Prisma, user_id: str):
+    return await db.payment.find_many(
+        where={"loan": {"is": {"userId": user_id}}},
+        take=PAGE_SIZE,
+        order=[{"date": "desc"}, {"id": "desc"}],
+    )
+
+
+async def measure(fn, db: Prisma, user_id: str, repeat: int) -> float:
+    """Return the median latency of `fn` in milliseconds."""
+    await fn(db, user_id)  # warm up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn(db, user_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(loan_counts, repeat: int):
+    db = Prisma()
+    await db.connect()
+    user_ids = []
+
+    try:
+        print(f"{'loans':>8} {'two-step ms':>12} {'relational ms':>14} {'speedup':>8}")
+        for loan_count in loan_counts:
+            user_id = await seed_user(db, loan_count)
+            user_ids.append(user_id)
+
+            old = await measure(two_step, db, user_id, repeat)
+            new = await measure(relational, db, user_id, repeat)
+            print(f"{loan_count:>8} {old:>12.2f} {new:>14.2f} {old / new:>7.1f}x")
+    finally:
+        # Loans and payments cascade
+        await db.user.delete_many(where={"id": {"in": user_ids}})
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--loans", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.loans, args.repeat))
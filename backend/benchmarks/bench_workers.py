@@ -0,0 +1,118 @@
+"""
+Throughput scaling with the number of uvicorn workers.
+
+Seeds a synthetic book once, then for each worker count starts the app in
+production mode (`uvicorn --workers N`, no reloader) on a local port and
+drives a mix of read and auth scenarios from bench_api over real HTTP.
+Reports requests per second per scenario and the speedup over the first
+worker count. Seeded rows are removed afterwards.
+
+Usage (against a disposable local database with migrations applied):
+
+    pip install -r benchmarks/requirements.txt
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python benchmarks/bench_workers.py --workers 1 2 4
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_api import SCENARIOS, cleanup, run_scenario, seed
+from app.database import connect_db, disconnect_db
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCENARIOS = ["auth.login", "auth.me", "loans.list", "loans.get", "loans.schedule", "payments.by_loan"]
+
+
+def start_server(workers: int, port: int, pool_size: int) -> subprocess.Popen:
+    """Start uvicorn the way entrypoint.sh does in production mode."""
+    env = dict(os.environ, APP_ENV="production", DB_POOL_SIZE=str(pool_size))
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0):
+    """Poll /health until the server answers."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not become ready")
+        await asyncio.sleep(0.2)
+
+
+async def main(args) -> int:
+    prefix = f"bench-workers-{uuid.uuid4().hex[:8]}-"
+    scenarios = [s for s in SCENARIOS if s.name in args.scenarios]
+
+    await connect_db()
+    try:
+        print(f"🌱 Seeding {args.users} users x {args.loans_per_user} loans x {args.payments_per_loan} payments...")
+        ctx = await seed(prefix, args.users, args.loans_per_user, args.payments_per_loan)
+
+        throughput: Dict[int, Dict[str, float]] = {}
+        for workers in args.workers:
+            server = start_server(workers, args.port, args.pool_size)
+            try:
+                # Workers are separate processes, so the client gets as many connections as requests in flight
+                limits = httpx.Limits(max_connections=args.concurrency)
+                async with httpx.AsyncClient(
+                    base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=30.0
+                ) as client:
+                    await wait_ready(client)
+                    throughput[workers] = {}
+                    for scenario in scenarios:
+                        # Warm every worker's caches and pool before measuring
+                        await run_scenario(client, ctx, scenario, args.concurrency * workers, args.concurrency)
+                        summary = await run_scenario(client, ctx, scenario, args.requests, args.concurrency)
+                        throughput[workers][scenario.name] = summary["throughput_rps"]
+                        if summary["errors"]:
+                            print(f"⚠️  {workers} workers, {scenario.name}: {summary['errors']} errors")
+            finally:
+                server.terminate()
+                server.wait()
+
+        base = args.workers[0]
+        print(f"{'scenario':<20}" + "".join(f"{f'{n}w req/s':>12}" for n in args.workers) + f"{'speedup':>10}")
+        for scenario in scenarios:
+            row = [throughput[n][scenario.name] for n in args.workers]
+            speedup = row[-1] / throughput[base][scenario.name] if throughput[base][scenario.name] else 0.0
+            print(f"{scenario.name:<20}" + "".join(f"{value:>12.0f}" for value in row) + f"{speedup:>9.2f}x")
+    finally:
+        await cleanup(prefix)
+        await disconnect_db()
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pool-size", type=int, default=10, help="DB_POOL_SIZE per worker")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--loans-per-user", type=int, default=10)
+    parser.add_argument("--payments-per-loan", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--scenarios", nargs="+", default=DEFAULT_SCENARIOS)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,11 +1,29 @@
 #!/bin/sh
+set -e
 
 # Wait for DB to be ready (optional, but good practice if not using depends_on strictly or for robust startup)
 # For simplicity, we assume depends_on in docker-compose handles start order, 
 # but migrations might need a retry mechanism if DB is initializing.
 
-echo "Running migrations..."
-prisma migrate deploy --schema=prisma/schema.prisma
+# Migrations run once here, before any worker starts. Set RUN_MIGRATIONS=false
+# when several containers share a database and a release job migrates instead.
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    echo "Running migrations..."
+    # Backfills the data added by newly applied migrations as well
+    python scripts/migrate.py
+fi
+
+if [ "$APP_ENV" = "production" ]; then
+    # One process per core by default; each worker connects its own Prisma pool
+    WORKERS="${WEB_CONCURRENCY:-$(nproc)}"
+    # Workers publish their metrics here so /metrics serves all of them;
+    # snapshots of a previous run's workers are removed first
+    export METRICS_DIR="${METRICS_DIR:-/tmp/loan-app-metrics}"
+    mkdir -p "$METRICS_DIR"
+    rm -f "$METRICS_DIR"/worker-*.json
+    echo "Starting server with $WORKERS workers..."
+    exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS" --proxy-headers --no-server-header
+fi
 
 echo "Starting server..."
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
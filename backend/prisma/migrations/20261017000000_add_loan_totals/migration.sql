@@ -0,0 +1,9 @@
+-- Running totals over completed payments (app/services/loan_totals.py).
+-- Existing loans start at zero; `python scripts/migrate.py` backfills them
+-- with reconcile_loan_totals right after this migration is applied.
+
+-- AlterTable
+ALTER TABLE "Loan" ADD COLUMN IF NOT EXISTS "paidAmount" DOUBLE PRECISION NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS "paymentCount" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS "lastPaymentDate" TIMESTAMP(3),
+ADD COLUMN IF NOT EXISTS "outstandingBalance" DOUBLE PRECISION NOT NULL DEFAULT 0;
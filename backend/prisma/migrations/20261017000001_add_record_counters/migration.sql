@@ -0,0 +1,13 @@
+-- Denormalized list totals (app/services/counters.py). Created empty;
+-- `python scripts/migrate.py` backfills them with reconcile_counters right
+-- after this migration is applied.
+
+-- CreateTable
+CREATE TABLE IF NOT EXISTS "RecordCounter" (
+    "entity" TEXT NOT NULL,
+    "scope" TEXT NOT NULL DEFAULT '',
+    "status" TEXT NOT NULL DEFAULT '',
+    "total" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "RecordCounter_pkey" PRIMARY KEY ("entity","scope","status")
+);
@@ -0,0 +1,14 @@
+-- Portfolio aggregates (app/services/analytics.py). Created empty;
+-- `python scripts/migrate.py` backfills them with rebuild_portfolio_summary
+-- right after this migration is applied.
+
+-- CreateTable
+CREATE TABLE IF NOT EXISTS "PortfolioSummary" (
+    "status" TEXT NOT NULL,
+    "originationMonth" TEXT NOT NULL,
+    "loanCount" INTEGER NOT NULL DEFAULT 0,
+    "totalAmount" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "paidAmount" DOUBLE PRECISION NOT NULL DEFAULT 0,
+
+    CONSTRAINT "PortfolioSummary_pkey" PRIMARY KEY ("status","originationMonth")
+);
@@ -0,0 +1,7 @@
+-- One index per migration: CREATE INDEX CONCURRENTLY cannot run in a
+-- transaction block, and building concurrently keeps Loan and Payment
+-- writable while the index is built. Databases that applied the earlier
+-- version of this migration (all indexes, non-concurrently) already have
+-- every index, so the following migrations are no-ops there
+-- CreateIndex
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "User_createdAt_id_idx" ON "User"("createdAt", "id");
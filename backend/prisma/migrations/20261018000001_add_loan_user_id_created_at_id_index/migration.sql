@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Loan_userId_createdAt_id_idx" ON "Loan"("userId", "createdAt", "id");
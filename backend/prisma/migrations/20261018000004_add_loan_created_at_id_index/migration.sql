@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Loan_createdAt_id_idx" ON "Loan"("createdAt", "id");
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Payment_loanId_status_date_id_idx" ON "Payment"("loanId", "status", "date", "id");
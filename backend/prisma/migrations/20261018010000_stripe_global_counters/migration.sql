@@ -0,0 +1,3 @@
+-- Global totals are striped over "all:<n>" scopes; move the existing
+-- global rows into the first stripe
+UPDATE "RecordCounter" SET "scope" = 'all:0' WHERE "scope" = '';
@@ -0,0 +1,7 @@
+-- Each (status, originationMonth) bucket is striped over rows picked by the
+-- loan owner; existing rows become stripe 0
+
+-- AlterTable
+ALTER TABLE "PortfolioSummary" ADD COLUMN "stripe" INTEGER NOT NULL DEFAULT 0,
+DROP CONSTRAINT "PortfolioSummary_pkey",
+ADD CONSTRAINT "PortfolioSummary_pkey" PRIMARY KEY ("status", "originationMonth", "stripe");
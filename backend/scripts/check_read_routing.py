@@ -0,0 +1,89 @@
+"""
+Check read-replica routing and read-your-writes stickiness.
+
+Point DATABASE_URL and READ_DATABASE_URL at two independent local Postgres
+instances with migrations applied; no replication is needed. The script
+creates a user on the primary only, so a GET served by the replica
+returns 404 and one served by the primary returns 200. It then checks
+that reads go to the replica by default, stick to the primary after a
+write (per user in this process, and per client via the sticky cookie)
+and return to the replica once READ_STICKY_SECONDS have passed.
+
+Usage:
+
+    pip install -r benchmarks/requirements.txt
+    DATABASE_URL=postgresql://...:5432/loanapp READ_DATABASE_URL=postgresql://...:5433/loanapp \\
+        READ_STICKY_SECONDS=2 JWT_SECRET_KEY=x python scripts/check_read_routing.py
+"""
+import asyncio
+import os
+import sys
+import uuid
+from typing import List, Tuple
+
+import httpx
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth.jwt_handler import create_access_token
+from app.config import settings
+from app.database import db, has_replica
+from app.main import app
+from app.middleware.replica import STICKY_COOKIE
+
+
+def served_by(response: httpx.Response) -> str:
+    """The user only exists on the primary, so the replica answers 404."""
+    return {200: "primary", 404: "replica"}.get(response.status_code, str(response.status_code))
+
+
+async def main() -> int:
+    if not has_replica():
+        print("❌ READ_DATABASE_URL is not set")
+        return 1
+
+    # (check, observed, expected)
+    checks: List[Tuple[str, str, str]] = []
+
+    async with app.router.lifespan_context(app):
+        email = f"read-routing-{uuid.uuid4().hex[:8]}@example.com"
+        user = await db.user.create(
+            data={"name": "Read routing", "email": email, "password": "x", "role": "user"}
+        )
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': user.id, 'role': 'user'})}"}
+        path = f"/users/{user.id}"
+
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://check") as writer, \
+                    httpx.AsyncClient(transport=transport, base_url="http://check") as other:
+                checks.append(("read before any write", served_by(await writer.get(path, headers=headers)), "replica"))
+
+                response = await writer.put(path, json={"name": "Read routing (updated)"}, headers=headers)
+                checks.append(("write", str(response.status_code), "200"))
+                checks.append(("sticky cookie", str(STICKY_COOKIE in writer.cookies), "True"))
+                checks.append(("read after write", served_by(await writer.get(path, headers=headers)), "primary"))
+                checks.append((
+                    "read after write, other client",
+                    served_by(await other.get(path, headers=headers)),
+                    "primary"
+                ))
+
+                await asyncio.sleep(settings.READ_STICKY_SECONDS + 0.5)
+                # The cookie's Max-Age has passed; drop it as a browser would
+                writer.cookies.clear()
+                checks.append(("read after window", served_by(await writer.get(path, headers=headers)), "replica"))
+        finally:
+            await db.user.delete(where={"id": user.id})
+
+    failures = 0
+    for name, observed, expected in checks:
+        failures += observed != expected
+        print(f"{'✅' if observed == expected else '❌'} {name}: {observed} (expected {expected})")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timezone
+from prisma import Prisma
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.delinquency import detect_delinquency
+
+
+def print_progress(scanned: int, defaulted: int, rows_per_second: float):
+    print(f"  {scanned} active loans scanned, {defaulted} defaulted - {rows_per_second:,.0f} rows/s")
+
+
+async def run_once(db: Prisma, args):
+    as_of = args.as_of or datetime.now(timezone.utc).date()
+    mode = " (dry run)" if args.dry_run else ""
+    print(f"🔎 Checking active loans as of {as_of}, defaulting after {args.default_after_days} days past due{mode}...")
+    
+    summary = await detect_delinquency(
+        db,
+        as_of,
+        args.default_after_days,
+        args.chunk_size,
+        dry_run=args.dry_run,
+        progress=print_progress
+    )
+    print(
+        f"✨ Scanned {summary['scanned']} loans in {summary['elapsedSeconds']}s "
+        f"({summary['rowsPerSecond']:,.0f} rows/s): {summary['delinquent']} past due, "
+        f"{summary['defaulted']} defaulted"
+    )
+
+
+async def main(args):
+    db = Prisma()
+    await db.connect()
+    
+    try:
+        while True:
+            await run_once(db, args)
+            if not args.interval_minutes:
+                break
+            await asyncio.sleep(args.interval_minutes * 60)
+    except Exception as e:
+        print(f"❌ Delinquency scan failed: {e}")
+        sys.exit(1)
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Default active loans that are too far past due")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="evaluation date (YYYY-MM-DD, default: today UTC)")
+    parser.add_argument("--default-after-days", type=int, default=settings.DELINQUENCY_DEFAULT_DAYS)
+    parser.add_argument("--chunk-size", type=int, default=settings.DELINQUENCY_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="report without updating loans")
+    parser.add_argument(
+        "--interval-minutes",
+        type=float,
+        default=0,
+        help="keep running as a worker, rescanning at this interval"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+"""
+Apply pending migrations, then backfill what the newly applied ones added.
+
+Some migrations add denormalized data (loan totals, list counters, the
+portfolio summary) that SQL alone should not compute; the app's own
+reconcile/rebuild helpers fill it in. This script runs
+`prisma migrate deploy` and then, for each of those migrations applied by
+this run, the matching helper. Use it wherever `prisma migrate deploy`
+would be run. If it stops between the two steps, run
+`python scripts/reconcile_counters.py` to backfill everything.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+from typing import Awaitable, Callable, List, Set, Tuple
+from prisma import Prisma
+
+# Add parent directory to path to import app modules
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.services.analytics import rebuild_portfolio_summary
+from app.services.counters import reconcile_counters
+from app.services.loan_totals import reconcile_loan_totals
+
+# Migration -> helper backfilling what it added, in migration order
+BACKFILLS: List[Tuple[str, Callable[[Prisma], Awaitable[int]]]] = [
+    ("20261017000000_add_loan_totals", reconcile_loan_totals),
+    ("20261017000001_add_record_counters", reconcile_counters),
+    ("20261017000002_add_portfolio_summary", rebuild_portfolio_summary),
+]
+
+
+async def applied_migrations(db: Prisma) -> Set[str]:
+    """Names of the migrations recorded as applied (none on an empty database)."""
+    rows = await db.query_raw("SELECT to_regclass('_prisma_migrations') IS NOT NULL AS \"exists\"")
+    if not rows[0]["exists"]:
+        return set()
+    rows = await db.query_raw(
+        'SELECT "migration_name" FROM "_prisma_migrations" '
+        'WHERE "finished_at" IS NOT NULL AND "rolled_back_at" IS NULL'
+    )
+    return {row["migration_name"] for row in rows}
+
+
+async def main() -> int:
+    db = Prisma()
+    await db.connect()
+
+    try:
+        before = await applied_migrations(db)
+
+        print("🚚 Applying migrations...")
+        deploy = subprocess.run(
+            ["prisma", "migrate", "deploy", "--schema=prisma/schema.prisma"],
+            cwd=BACKEND_DIR
+        )
+        if deploy.returncode != 0:
+            print("❌ prisma migrate deploy failed")
+            return deploy.returncode
+
+        applied = (await applied_migrations(db)).difference(before)
+        for migration, backfill in BACKFILLS:
+            if migration in applied:
+                rows = await backfill(db)
+                print(f"✨ Backfilled {migration} ({rows} rows).")
+        return 0
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return 1
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
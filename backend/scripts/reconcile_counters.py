@@ -0,0 +1,34 @@
+import asyncio
+import os
+import sys
+from prisma import Prisma
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.analytics import rebuild_portfolio_summary
+from app.services.counters import reconcile_counters
+from app.services.loan_totals import reconcile_loan_totals
+
+
+async def main():
+    print("🔢 Reconciling loan totals, list counters and portfolio summary...")
+    
+    db = Prisma()
+    await db.connect()
+    
+    try:
+        loans = await reconcile_loan_totals(db)
+        print(f"💰 Recomputed running totals for {loans} loans.")
+        written = await reconcile_counters(db)
+        print(f"✨ Rebuilt {written} counter rows from source tables.")
+        buckets = await rebuild_portfolio_summary(db)
+        print(f"📊 Rebuilt {buckets} portfolio summary rows.")
+    except Exception as e:
+        print(f"❌ Reconciliation failed: {e}")
+        sys.exit(1)
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
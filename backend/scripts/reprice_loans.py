@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import os
+import sys
+from prisma import Prisma
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.repricing import reprice_loans
+
+
+def print_progress(processed: int, matched: int, rows_per_second: float):
+    percent = processed / matched * 100 if matched else 100.0
+    print(f"  {processed}/{matched} loans ({percent:.1f}%) - {rows_per_second:,.0f} rows/s")
+
+
+async def main(args):
+    where = {}
+    if args.current_rate is not None:
+        where["interestRate"] = args.current_rate
+    if args.status:
+        where["status"] = args.status
+    if args.user_id:
+        where["userId"] = args.user_id
+    
+    print(f"💱 Repricing loans matching {where or 'all'} to {args.rate}%...")
+    
+    db = Prisma()
+    await db.connect()
+    
+    try:
+        summary = await reprice_loans(db, where, args.rate, args.chunk_size, progress=print_progress)
+        print(
+            f"✨ Updated {summary['updated']}/{summary['matched']} loans in "
+            f"{summary['elapsedSeconds']}s ({summary['rowsPerSecond']:,.0f} rows/s); "
+            f"{summary['skipped']} changed or deleted meanwhile were skipped"
+        )
+    except Exception as e:
+        print(f"❌ Repricing failed: {e}")
+        sys.exit(1)
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reprice loans and recompute monthlyPayment")
+    parser.add_argument("--rate", type=float, required=True, help="new annual interest rate (percent)")
+    parser.add_argument("--current-rate", type=float, help="only loans currently at this rate")
+    parser.add_argument("--status", help="only loans with this status")
+    parser.add_argument("--user-id", help="only loans owned by this user")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
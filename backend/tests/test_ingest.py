@@ -0,0 +1,156 @@
+"""
+End-to-end test of `POST /payments/ingest` through a real uvicorn server.
+
+Needs a disposable database with migrations applied:
+
+    pip install -r tests/requirements.txt
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, NamedTuple
+
+import pytest
+
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+import httpx
+import uvicorn
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth.jwt_handler import create_access_token
+from app.config import settings
+from app.database import db
+from app.main import app
+from app.services.analytics import rebuild_portfolio_summary
+from app.services.counters import reconcile_counters
+from app.services.loan_totals import reconcile_loan_totals
+
+# Split lines across chunks, and span several BULK_CHUNK_SIZE batches
+CHUNK_BYTES = 4096
+LINES = settings.BULK_CHUNK_SIZE * 2 + 17
+TIMEOUT = 30
+
+
+class Setup(NamedTuple):
+    """A running server and a loan owned by a fresh user."""
+    port: int
+    loan_id: str
+    token: str
+    line: bytes
+
+
+@asynccontextmanager
+async def _setup() -> AsyncIterator[Setup]:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    email = f"ingest-test-{uuid.uuid4().hex[:8]}@example.com"
+    try:
+        user = await db.user.create(data={"name": "Ingest test", "email": email, "password": "x", "role": "user"})
+        loan = await db.loan.create(data={
+            "borrowerName": "Ingest test", "amount": 1000000.0, "interestRate": 5.0, "loanTerm": 12,
+            "startDate": "2026-01-01T00:00:00Z", "status": "active", "monthlyPayment": 100.0,
+            "outstandingBalance": 1000000.0, "userId": user.id,
+        })
+        line = json.dumps({
+            "loanId": loan.id, "amount": 10.0, "date": "2026-02-01T00:00:00Z", "status": "completed"
+        }).encode() + b"\n"
+        yield Setup(port, loan.id, create_access_token({"sub": user.id, "role": "user"}), line)
+    finally:
+        await db.user.delete_many(where={"email": email})
+        await reconcile_loan_totals(db)
+        await reconcile_counters(db)
+        await rebuild_portfolio_summary(db)
+        server.should_exit = True
+        await serving
+
+
+async def _ingest(lines: int) -> None:
+    async with _setup() as setup:
+        body = setup.line * lines
+
+        async def chunks():
+            for offset in range(0, len(body), CHUNK_BYTES):
+                yield body[offset:offset + CHUNK_BYTES]
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{setup.port}", timeout=TIMEOUT) as client:
+            response = await client.post(
+                "/payments/ingest",
+                content=chunks(),
+                headers={"Authorization": f"Bearer {setup.token}", "Content-Type": "application/x-ndjson"}
+            )
+
+        results = [json.loads(result) for result in response.text.splitlines()]
+        assert response.status_code == 200
+        assert results[-1] == {"summary": {"created": lines, "failed": 0}}
+        assert [result["line"] for result in results[:-1]] == list(range(1, lines + 1))
+        assert await db.payment.count(where={"loanId": setup.loan_id}) == lines
+
+
+async def _read_results(reader: asyncio.StreamReader, count: int) -> List[dict]:
+    """Read chunked response parts until `count` result lines arrived."""
+    results: List[dict] = []
+    while len(results) < count:
+        size = int((await asyncio.wait_for(reader.readline(), TIMEOUT)).strip(), 16)
+        assert size, "response ended early"
+        part = await asyncio.wait_for(reader.readexactly(size + 2), TIMEOUT)
+        results.extend(json.loads(line) for line in part[:-2].splitlines())
+    return results
+
+
+def _chunk(data: bytes) -> bytes:
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+async def _ingest_streams_results_during_upload() -> None:
+    async with _setup() as setup:
+        # httpx sends the whole body before reading, so speak HTTP/1.1 directly
+        reader, writer = await asyncio.open_connection("127.0.0.1", setup.port)
+        try:
+            writer.write(
+                b"POST /payments/ingest HTTP/1.1\r\nHost: test\r\n"
+                b"Authorization: Bearer " + setup.token.encode() + b"\r\n"
+                b"Content-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n"
+            )
+            writer.write(_chunk(setup.line * settings.BULK_CHUNK_SIZE))
+            await writer.drain()
+
+            # The first chunk's results arrive while the body is still open
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), TIMEOUT)
+            assert head.startswith(b"HTTP/1.1 200")
+            first = await _read_results(reader, settings.BULK_CHUNK_SIZE)
+            assert [result["line"] for result in first] == list(range(1, settings.BULK_CHUNK_SIZE + 1))
+            assert all(result["status"] == "created" for result in first)
+
+            writer.write(_chunk(setup.line * 5) + _chunk(b""))
+            await writer.drain()
+            rest = await _read_results(reader, 6)
+            assert [result["line"] for result in rest[:-1]] == list(
+                range(settings.BULK_CHUNK_SIZE + 1, settings.BULK_CHUNK_SIZE + 6)
+            )
+            assert rest[-1] == {"summary": {"created": settings.BULK_CHUNK_SIZE + 5, "failed": 0}}
+        finally:
+            writer.close()
+        assert await db.payment.count(where={"loanId": setup.loan_id}) == settings.BULK_CHUNK_SIZE + 5
+
+
+def test_ingest_multi_chunk_body_creates_every_row():
+    asyncio.run(_ingest(LINES))
+
+
+def test_ingest_small_body_does_not_hang():
+    asyncio.run(_ingest(3))
+
+
+def test_ingest_streams_results_before_the_upload_ends():
+    asyncio.run(_ingest_streams_results_during_upload())
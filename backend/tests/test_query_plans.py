@@ -0,0 +1,232 @@
+"""
+Check that the hot queries are served by indexes.
+
+Seeds a synthetic book, then plans with EXPLAIN:
+
+- the keyset page queries behind the list and export endpoints (first and
+  cursor pages, for every filter combination), written the way Prisma's
+  query builder issues them;
+- every raw SQL statement the write paths, the delinquency scan and
+  `include=` issue, captured as the services run through
+  `capture_raw_queries`.
+
+Fails if any plan falls back to a sequential scan of User, Loan or
+Payment. Needs a disposable database with migrations applied:
+
+    pip install -r tests/requirements.txt
+    DATABASE_URL=postgresql://... JWT_SECRET_KEY=x python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pytest
+
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import capture_raw_queries, connect_db, db, disconnect_db
+from app.includes import load_payments
+from app.services import analytics, counters, loan_totals
+from app.services.delinquency import _default_chunk
+
+SEED_PREFIX = "plantest-"
+USERS = 20000
+LOANS_PER_USER = 5
+PAYMENTS_PER_LOAN = 3
+
+CHECKED_TABLES = {"User", "Loan", "Payment"}
+
+# Non-admin payment lists filter on the owning loan with a subquery
+_OWNED_PAYMENTS = '"loanId" IN (SELECT "id" FROM "Loan" WHERE "userId" = {owner})'
+
+
+def _page(table: str, sort: str, *conditions: str, cursor: bool = False) -> Tuple[str, List[str]]:
+    """
+    One keyset page query: filters, optional cursor, (sort, id) DESC, LIMIT.
+
+    Conditions name their values as {key}; returns the SQL with $n
+    placeholders and the keys in placeholder order.
+    """
+    conditions = list(conditions)
+    if cursor:
+        conditions.append(
+            f'("{sort}" < {{{table}_at}}::timestamp(3) '
+            f'OR ("{sort}" = {{{table}_at}}::timestamp(3) AND "id" < {{{table}_id}}))'
+        )
+    keys: List[str] = []
+    for condition in conditions:
+        for key in re.findall(r"\{(\w+)\}", condition):
+            if key not in keys:
+                keys.append(key)
+    placeholders = {key: f"${index + 1}" for index, key in enumerate(keys)}
+    where = " WHERE " + " AND ".join(conditions).format(**placeholders) if conditions else ""
+    return f'SELECT * FROM "{table}"{where} ORDER BY "{sort}" DESC, "id" DESC LIMIT 101', keys
+
+
+# (name, table, sort column, filter conditions) of every list/export query
+PAGES: List[Tuple[str, str, str, Tuple[str, ...]]] = [
+    ("GET /users", "User", "createdAt", ()),
+    ("GET /loans (admin)", "Loan", "createdAt", ()),
+    ("GET /loans?status (admin), delinquency scan", "Loan", "createdAt", ('"status" = {status}',)),
+    ("GET /loans, /loans/export (owner)", "Loan", "createdAt", ('"userId" = {owner}',)),
+    ("GET /loans?status (owner)", "Loan", "createdAt", ('"userId" = {owner}', '"status" = {status}')),
+    ("GET /payments (admin)", "Payment", "date", ()),
+    ("GET /payments?status (admin)", "Payment", "date", ('"status" = {completed}',)),
+    ("GET /payments, /payments/export (owner)", "Payment", "date", (_OWNED_PAYMENTS,)),
+    ("GET /payments?loan_id, /payments/loan/{id}", "Payment", "date", ('"loanId" = {loan}', _OWNED_PAYMENTS)),
+    (
+        "GET /payments?loan_id&status",
+        "Payment",
+        "date",
+        ('"loanId" = {loan}', '"status" = {completed}', _OWNED_PAYMENTS),
+    ),
+]
+
+KNOWN: Dict[str, Tuple[str, List[str]]] = {}
+for _name, _table, _sort, _conditions in PAGES:
+    KNOWN[_name] = _page(_table, _sort, *_conditions)
+    KNOWN[f"{_name} &cursor"] = _page(_table, _sort, *_conditions, cursor=True)
+
+
+async def _seed() -> Dict[str, Any]:
+    """Insert the synthetic book with generate_series; return sample values for the queries."""
+    loans = USERS * LOANS_PER_USER
+    await db.execute_raw(
+        'INSERT INTO "User" ("id", "name", "email", "password", "role", "createdAt", "updatedAt") '
+        "SELECT $1 || 'user-' || n, 'Plan test', $1 || n || '@example.com', 'x', 'user', "
+        "NOW() - n * INTERVAL '1 minute', NOW() "
+        "FROM generate_series(1, $2::int) AS n",
+        SEED_PREFIX,
+        USERS,
+    )
+    await db.execute_raw(
+        'INSERT INTO "Loan" ("id", "borrowerName", "amount", "interestRate", "loanTerm", "startDate", '
+        '"status", "monthlyPayment", "outstandingBalance", "userId", "createdAt", "updatedAt") '
+        "SELECT $1 || 'loan-' || n, 'Plan test', 1000, 5, 12, NOW() - (n % 720) * INTERVAL '1 day', "
+        "(ARRAY['pending', 'active', 'completed', 'defaulted'])[n % 4 + 1], 85.61, 1000, "
+        "$1 || 'user-' || (n % $2::int + 1), NOW() - n * INTERVAL '1 second', NOW() "
+        "FROM generate_series(1, $3::int) AS n",
+        SEED_PREFIX,
+        USERS,
+        loans,
+    )
+    await db.execute_raw(
+        'INSERT INTO "Payment" ("id", "loanId", "amount", "date", "status", "createdAt", "updatedAt") '
+        "SELECT $1 || 'payment-' || n, $1 || 'loan-' || (n % $2::int + 1), 85.61, "
+        "NOW() - n * INTERVAL '1 second', (ARRAY['pending', 'completed', 'failed'])[n % 3 + 1], NOW(), NOW() "
+        "FROM generate_series(1, $3::int) AS n",
+        SEED_PREFIX,
+        loans,
+        loans * PAYMENTS_PER_LOAN,
+    )
+    await db.execute_raw('ANALYZE "User", "Loan", "Payment"')
+
+    loan = await db.loan.find_first(where={"id": {"startswith": SEED_PREFIX}, "status": "active"})
+    payment = await db.payment.find_first(where={"loanId": loan.id})
+    user = await db.user.find_unique(where={"id": loan.userId})
+    return {
+        "owner": loan.userId,
+        "loan": loan.id,
+        "status": "active",
+        "completed": "completed",
+        "User_at": user.createdAt.isoformat(),
+        "User_id": user.id,
+        "Loan_at": loan.createdAt.isoformat(),
+        "Loan_id": loan.id,
+        "Payment_at": payment.date.isoformat(),
+        "Payment_id": payment.id,
+        "payment": payment.id,
+    }
+
+
+async def _cleanup():
+    """Remove seeded rows (loans and payments cascade)."""
+    await db.execute_raw('DELETE FROM "User" WHERE "id" LIKE $1', SEED_PREFIX + "%")
+
+
+class _Rollback(Exception):
+    """Raised to roll back the transaction the write-path statements run in."""
+
+
+async def _service_queries(sample: Dict[str, Any]) -> List[Tuple[str, Tuple[Any, ...]]]:
+    """Run the services that issue raw SQL and return the statements they sent."""
+    with capture_raw_queries() as captured:
+        await load_payments(db, [sample["loan"]], 10)
+        # A stale paidAmount, so the default UPDATE matches nothing
+        await _default_chunk(db, [SimpleNamespace(id=sample["loan"], paidAmount=-1.0)])
+        try:
+            async with db.tx() as transaction:
+                await loan_totals.lock_loans(transaction, [sample["loan"]])
+                await loan_totals.lock_loans(transaction, [sample["loan"]], sample["owner"])
+                await loan_totals.lock_payment_loan(transaction, sample["payment"])
+                await loan_totals.lock_payment_loan(transaction, sample["payment"], sample["owner"])
+                await counters.loan_payment_counts(transaction, sample["loan"])
+                await loan_totals.apply_deltas(transaction, {sample["loan"]: [0.0, 0, None, True]})
+                await analytics.forget_user(transaction, sample["owner"])
+                await counters.forget_user(transaction, sample["owner"])
+                raise _Rollback()
+        except _Rollback:
+            pass
+    return captured
+
+
+def _sequential_scans(plan: Dict[str, Any]) -> List[str]:
+    """Checked tables read by a Seq Scan anywhere in a JSON plan tree."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_sequential_scans(child))
+    return found
+
+
+async def _explain(sql: str, params: Sequence[Any]) -> Dict[str, Any]:
+    """Plan a statement with its parameters (nothing is executed)."""
+    rows = await db.query_raw(f"EXPLAIN (FORMAT JSON) {sql}", *params)
+    plan = rows[0]["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def _plan_all() -> Dict[str, Tuple[str, List[str]]]:
+    """Seed, plan every known and captured statement, clean up; name -> (SQL, seq-scanned tables)."""
+    await connect_db()
+    try:
+        sample = await _seed()
+        plans = {}
+        for name, (sql, keys) in KNOWN.items():
+            plans[name] = (sql, _sequential_scans(await _explain(sql, [sample[key] for key in keys])))
+
+        for sql, params in await _service_queries(sample):
+            if any(f'"{table}"' in sql for table in CHECKED_TABLES):
+                plans[f"raw: {' '.join(sql.split())[:80]}"] = (sql, _sequential_scans(await _explain(sql, params)))
+        return plans
+    finally:
+        await _cleanup()
+        await disconnect_db()
+
+
+@pytest.fixture(scope="module")
+def plans() -> Dict[str, Tuple[str, List[str]]]:
+    return asyncio.run(_plan_all())
+
+
+@pytest.mark.parametrize("name", list(KNOWN))
+def test_page_query_uses_indexes(plans, name):
+    sql, scans = plans[name]
+    assert not scans, f"Seq Scan on {', '.join(scans)}:\n{sql}"
+
+
+def test_raw_service_queries_use_indexes(plans):
+    raw = {name: plan for name, plan in plans.items() if name.startswith("raw: ")}
+    assert raw, "no raw statements were captured"
+    regressed = {name: scans for name, (_, scans) in raw.items() if scans}
+    assert not regressed, f"Seq Scans in {regressed}"